@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+from collections import OrderedDict
+from multiprocessing import Process
+from urllib.parse import parse_qs, urlsplit
+
+import data_phonepe
+import snapshot_phonepe
+
+# Read-only JSON API over the same aggregates the Streamlit page shows.
+#   python api_phonepe.py --csv-dir fixtures/ --port 8080 --workers 4
+#
+# GET /api/meta
+# GET /api/states?year=2023&quarter=4
+# GET /api/districts?year=2023&quarter=4&state=Karnataka
+# GET /api/pincodes?year=2023&quarter=4&state=Karnataka&category=users&limit=10
+# GET /api/categories?year=2023&quarter=4&state=Karnataka
+
+CACHE_CONTROL = "public, max-age=300"
+#Encoded bodies kept per process, least recently used evicted first
+BODY_CACHE_SIZE = 2048
+MAX_LIMIT = 1000
+
+logger = logging.getLogger("api_phonepe")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    # numpy scalars coming out of pandas sums
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _int_param(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ApiError(400, f"missing query parameter: {name}")
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise ApiError(400, f"query parameter {name} must be an integer")
+
+
+def _key_params(params, pre_agg):
+    year = _int_param(params, "year")
+    quarter = _int_param(params, "quarter")
+    state = params.get("state", ["All India"])[0]
+    if year not in pre_agg["years"] or quarter not in pre_agg["quarters"]:
+        raise ApiError(404, f"no data for Q{quarter} {year}")
+    if state != "All India" and state not in pre_agg["states"]:
+        raise ApiError(404, f"unknown state: {state}")
+    return year, quarter, state
+
+
+def _records(df):
+    return df.to_dict(orient="records")
+
+
+def parse_request(path, params, pre_agg):
+    # Validated, canonical form of a request: (endpoint, year, quarter, state, category, limit). Parameters an
+    # endpoint does not use are dropped, so the tuple is both the ETag input and the body cache key.
+    if path == "/api/meta":
+        return (path, None, None, None, None, None)
+    year, quarter, state = _key_params(params, pre_agg)
+    category = limit = None
+    if path == "/api/pincodes":
+        category = params.get("category", ["transactions"])[0]
+        if category not in ("transactions", "users"):
+            raise ApiError(400, "category must be 'transactions' or 'users'")
+        limit = _int_param(params, "limit", 10)
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ApiError(400, f"limit must be between 1 and {MAX_LIMIT}")
+    return (path, year, quarter, state, category, limit)
+
+
+def states_endpoint(pre_agg, year, quarter, state, category, limit):
+    key = (year, quarter, "All India")
+    txn = pre_agg["map_transaction_state_dict"][key]
+    usr = pre_agg["map_user_state_dict"][key]
+    merged = txn.merge(usr, on="States", how="outer").fillna(0)
+    return {"year": year, "quarter": quarter, "states": _records(merged)}
+
+
+def districts_endpoint(pre_agg, year, quarter, state, category, limit):
+    key = (year, quarter, state)
+    txn = pre_agg["map_transaction_district_dict"][key]
+    usr = pre_agg["map_user_district_dict"][key]
+    #Feature_id is only there when the API was started with the district GeoJSON (--geojson-dir)
+    merged = txn.merge(usr, on=[column for column in ["Districts", "Feature_id"] if column in txn], how="outer").fillna({"Transaction_count": 0, "Transaction_amount": 0, "RegisteredUser": 0, "AppOpens": 0})
+    return {"year": year, "quarter": quarter, "state": state, "districts": _records(merged)}
+
+
+def pincodes_endpoint(pre_agg, year, quarter, state, category, limit):
+    key = (year, quarter, state)
+    if category == "transactions":
+        df, column = pre_agg["top_transaction_dict"][key], "Transaction_count"
+    else:
+        df, column = pre_agg["top_user_dict"][key], "RegisteredUser"
+    top = df.dropna(subset=["Pincodes"]).sort_values(column, ascending=False).head(limit)
+    return {"year": year, "quarter": quarter, "state": state, "category": category, "pincodes": _records(top)}
+
+
+def categories_endpoint(pre_agg, year, quarter, state, category, limit):
+    categories = data_phonepe.category_breakdown(pre_agg["category_matrix"], (year, quarter, state))
+    return {"year": year, "quarter": quarter, "state": state, "categories": categories}
+
+
+def meta_endpoint(pre_agg, year, quarter, state, category, limit):
+    return {"years": pre_agg["years"], "quarters": pre_agg["quarters"], "states": pre_agg["states"]}
+
+
+ROUTES = {
+    "/api/meta": meta_endpoint,
+    "/api/states": states_endpoint,
+    "/api/districts": districts_endpoint,
+    "/api/pincodes": pincodes_endpoint,
+    "/api/categories": categories_endpoint,
+}
+
+
+class AggregateApi:
+    # Request handling without any I/O so it can be driven directly from a script or REPL.
+    def __init__(self, pre_agg, version):
+        self.pre_agg = pre_agg
+        self.version = version
+        self.body_cache = OrderedDict()
+
+    def etag(self, request):
+        return '"%s-%s"' % (self.version, hashlib.sha1(repr(request).encode()).hexdigest()[:12])
+
+    def respond(self, method, target, headers):
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        url = urlsplit(target)
+        if url.path == "/healthz":
+            return 200, {"Content-Type": "text/plain"}, b"ok"
+        handler = ROUTES.get(url.path)
+        if handler is None:
+            return self.error(404, f"unknown endpoint: {url.path}")
+        try:
+            request = parse_request(url.path, parse_qs(url.query), self.pre_agg)
+        except ApiError as e:
+            return self.error(e.status, e.message)
+
+        # The data is immutable for the life of the process, so the ETag only depends on version + request
+        etag = self.etag(request)
+        cache_headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            return 304, cache_headers, b""
+
+        body = self.body_cache.get(request)
+        if body is None:
+            try:
+                payload = handler(self.pre_agg, *request[1:])
+            except ApiError as e:
+                return self.error(e.status, e.message)
+            except Exception:
+                logger.exception("%s failed", target)
+                return self.error(500, "internal server error")
+            payload["version"] = self.version
+            body = json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+            self.body_cache[request] = body
+            if len(self.body_cache) > BODY_CACHE_SIZE:
+                self.body_cache.popitem(last=False)
+        else:
+            self.body_cache.move_to_end(request)
+        return 200, dict(cache_headers, **{"Content-Type": "application/json"}), body
+
+    def error(self, status, message):
+        body = json.dumps({"error": message}).encode()
+        return status, {"Content-Type": "application/json", "Cache-Control": "no-store"}, body
+
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+async def handle_connection(api, reader, writer):
+    # Minimal HTTP/1.1 with keep-alive; one coroutine per connection, no thread per request
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, http_version = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if headers.get("content-length"):
+                await reader.readexactly(int(headers["content-length"]))
+
+            try:
+                status, response_headers, body = api.respond(method, target, headers)
+            except Exception:
+                logger.exception("%s %s failed", method, target)
+                status, response_headers, body = api.error(500, "internal server error")
+            keep_alive = http_version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            response_headers["Content-Length"] = str(len(body))
+            response_headers["Connection"] = "keep-alive" if keep_alive else "close"
+            head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            head += "".join(f"{k}: {v}\r\n" for k, v in response_headers.items()) + "\r\n"
+            writer.write(head.encode("latin-1"))
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(api, host, port, reuse_port):
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(api, r, w), host, port, reuse_port=reuse_port, backlog=1024
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def build_api(csv_dir=None, version=None, geojson_dir=None):
+    # version is the snapshot id when serving a snapshot; otherwise it is derived from the data itself.
+    # With geojson_dir (holding india_district.geojson) district rows carry the same Feature_id the dashboard
+    # map joins on; without it the column is left out rather than served as all nulls.
+    data = data_phonepe.load_all_data(csv_dir=csv_dir)
+    version = version or data_phonepe.data_version(data)
+    district_index = None
+    if geojson_dir:
+        with open(os.path.join(geojson_dir, "india_district.geojson")) as f:
+            district_geojson = data_phonepe.index_district_features(json.load(f))
+        district_index = data_phonepe.build_district_index(
+            district_geojson, data_phonepe.load_dimensions(csv_dir=csv_dir)["districts"]
+        )
+    pre_agg = data_phonepe.pre_aggregate_data(data, district_index=district_index)
+    if district_index is None:
+        for table in ["map_transaction_district_dict", "map_user_district_dict"]:
+            pre_agg[table] = {key: df.drop(columns="Feature_id") for key, df in pre_agg[table].items()}
+    return AggregateApi(pre_agg, version)
+
+
+def run_worker(args):
+    api = build_api(args.csv_dir, args.version, args.geojson_dir)
+    asyncio.run(serve(api, args.host, args.port, reuse_port=args.workers > 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API over the PhonePe Pulse aggregates")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--csv-dir", default=os.environ.get("PHONEPE_CSV_DIR"),
+                        help="read tables from <table>.csv files instead of MySQL")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes sharing the port (SO_REUSEPORT)")
+    parser.add_argument("--snapshot-root", default=os.environ.get("PHONEPE_SNAPSHOT_ROOT"),
+                        help="serve a published snapshot from this directory (see phonepe.py run --snapshot-root)")
+    parser.add_argument("--snapshot", help="snapshot id to serve (default: the CURRENT one)")
+    parser.add_argument("--geojson-dir", help="folder with india_district.geojson, adds map Feature_ids to /api/districts")
+    args = parser.parse_args()
+
+    if args.workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("--workers > 1 needs SO_REUSEPORT support")
+    if args.geojson_dir and not os.path.exists(os.path.join(args.geojson_dir, "india_district.geojson")):
+        parser.error(f"missing india_district.geojson in {args.geojson_dir}")
+    #Resolved once here so every worker serves the same snapshot even if CURRENT moves during startup
+    try:
+        args.csv_dir, args.version = snapshot_phonepe.resolve_source(args.csv_dir, args.snapshot_root, args.snapshot)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    print(f"Serving PhonePe API on http://{args.host}:{args.port} ({args.workers} worker(s), data version {args.version or 'from content'})")
+    if args.workers == 1:
+        run_worker(args)
+        return
+    workers = [Process(target=run_worker, args=(args,)) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Startup budget check for stream_phonepe.py.
+#   python bench_startup.py                       # cold import time of every module the app uses
+#   python bench_startup.py --csv-dir fixtures/   # also rerun-to-sidebar time of the first headless run
+#
+# Exits non-zero when a budget is exceeded so it can run in CI.
+
+#Modules needed before the header/sidebar paint, and the ones deferred until data/map rendering
+SHELL_MODULES = ["streamlit", "streamlit_option_menu"]
+DEFERRED_MODULES = ["pandas", "plotly.express", "requests", "mysql.connector"]
+
+
+def cold_import_ms(modules):
+    # {module: ms} for importing the modules in order in one fresh interpreter, as the app does. Each module's time
+    # is the cumulative time of its top-level import, so dependencies it shares with an earlier module (e.g.
+    # streamlit under streamlit_option_menu) are only counted once. None if any of them fails to import.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    times = dict.fromkeys(modules, 0.0)
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nested imports indented by two spaces per level
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() in times and not parts[2].startswith("  "):
+            times[parts[2].strip()] = int(parts[1]) / 1000
+    return times
+
+
+def rerun_to_sidebar_ms(csv_dir):
+    # First headless run of the script in this process: nothing is cached yet, but streamlit is already imported
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["PHONEPE_CSV_DIR"] = csv_dir
+    at = AppTest.from_file("stream_phonepe.py", default_timeout=120)
+    at.run()
+    return at.session_state["startup_timings"]["rerun_to_sidebar_ms"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure stream_phonepe.py import time and time-to-first-paint")
+    parser.add_argument("--csv-dir", help="data fixture for the first-paint run (see loadtest_phonepe.py make-fixture)")
+    parser.add_argument("--shell-budget-ms", type=float, default=float(os.environ.get("PHONEPE_IMPORT_BUDGET_MS", 500)))
+    parser.add_argument("--sidebar-budget-ms", type=float, default=float(os.environ.get("PHONEPE_SIDEBAR_BUDGET_MS", 1000)))
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<24}{'cold import (ms)':>18}  phase")
+    #The shell modules together in one interpreter; each deferred module on its own, cold
+    shell_times = cold_import_ms(SHELL_MODULES)
+    if shell_times is None:
+        print("shell imports failed:", ", ".join(SHELL_MODULES))
+        sys.exit(1)
+    for module, ms in shell_times.items():
+        print(f"{module:<24}{ms:>18.1f}  shell")
+    for module in DEFERRED_MODULES:
+        times = cold_import_ms([module])
+        if times is None:
+            print(f"{module:<24}{'not installed':>18}  deferred")
+        else:
+            print(f"{module:<24}{times[module]:>18.1f}  deferred")
+
+    shell_total = sum(shell_times.values())
+    print(f"\nshell imports: {shell_total:.1f} ms (budget {args.shell_budget_ms:.0f} ms)")
+    if shell_total > args.shell_budget_ms:
+        failed = True
+
+    if args.csv_dir:
+        ms = rerun_to_sidebar_ms(args.csv_dir)
+        print(f"rerun to sidebar: {ms:.1f} ms (budget {args.sidebar_budget_ms:.0f} ms)")
+        if ms > args.sidebar_budget_ms:
+            failed = True
+
+    if failed:
+        print("Startup budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
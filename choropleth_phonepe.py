@@ -0,0 +1,43 @@
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from views_phonepe import REDS_COLORSCALE, hover_text, install_plotly_js
+
+# Choropleth that ships each GeoJSON to the browser once per session (see components/geo_choropleth).
+# Later reruns only send the location ids, values and hover text for the current selection.
+
+_COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "geo_choropleth")
+install_plotly_js(_COMPONENT_DIR)
+_geo_choropleth = components.declare_component("geo_choropleth", path=_COMPONENT_DIR)
+
+def choropleth(df, geometry_key, geojson, locations, featureidkey, color, hover_name, hover_columns,
+               title, height=600, key="choropleth"):
+    # geometry_key identifies the GeoJSON (e.g. "states" or "districts:Karnataka"); it is only included in the
+    # component args the first time this component shows it in the session.
+    sent = st.session_state.setdefault("_geo_sent", {}).setdefault(key, set())
+    include_geometry = geometry_key not in sent
+
+    result = _geo_choropleth(
+        geometry_key=geometry_key,
+        geojson=geojson if include_geometry else None,
+        featureidkey=featureidkey,
+        locations=df[locations].tolist(),
+        z=df[color].tolist(),
+        text=hover_text(df, hover_name, hover_columns),
+        colorscale=REDS_COLORSCALE,
+        title=title,
+        height=height,
+        key=key,
+        default=None
+    )
+    sent.add(geometry_key)
+
+    # The iframe was remounted and lost its geometry cache: forget what was sent and rerun once per request
+    if result and result.get("need_geometry"):
+        handled = st.session_state.setdefault("_geo_requests", set())
+        if result["nonce"] not in handled:
+            handled.add(result["nonce"])
+            sent.clear()
+            st.rerun()
@@ -0,0 +1,783 @@
+import bisect
+import difflib
+import hashlib
+import io
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+import pandas as pd
+
+# Shared data layer for the Streamlit page (stream_phonepe.py) and the headless API (api_phonepe.py).
+# Nothing in here imports streamlit, so it can be reused by scripts and services.
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "root",
+    "database": "phonepe_new"
+}
+
+#Tables read by the dashboard
+TABLES = ["aggregated_transaction", "map_transaction", "map_user", "top_transaction", "top_user"]
+
+#Statemapping_standardize names
+STATE_MAPPING = {
+    "Andaman & Nicobar": "Andaman and Nicobar Islands",
+    "Dadra and Nagar Haveli and Daman and Diu": "Dadra and Nagar Haveli",
+    "Jammu & Kashmir": "Jammu and Kashmir",
+    "Delhi": "NCT of Delhi",
+    "India": "All India"
+}
+
+
+def standardize_states(states):
+    return states.str.strip().str.title().replace(STATE_MAPPING)
+
+
+def normalize_columns(table, df):
+    # phonepe.py writes map_transaction with a "District" column, everything downstream uses "Districts"
+    if table == "map_transaction" and "District" in df.columns:
+        df = df.rename(columns={"District": "Districts"})
+    return df
+
+
+#Two snapshots can be read side by side (A/B, rollback) before older tables are evicted
+@lru_cache(maxsize=2 * len(TABLES))
+def _read_csv_table(csv_dir, table):
+    df = pd.read_csv(os.path.join(csv_dir, f"{table}.csv"))
+    return normalize_columns(table, df)
+
+
+def _connect():
+    import mysql.connector
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def load_all_data(csv_dir=None):
+    # csv_dir: folder holding one <table>.csv per table, used instead of MySQL (local runs, fixtures)
+    if csv_dir:
+        return {table: _read_csv_table(csv_dir, table) for table in TABLES}
+
+    data = {}
+    conn = _connect()
+    try:
+        for table in TABLES:
+            df = pd.read_sql(f"SELECT * FROM {table}", conn)
+            data[table] = normalize_columns(table, df)
+    finally:
+        conn.close()
+    return data
+
+
+def load_quarter_data(year, quarter, csv_dir=None):
+    # Same tables as load_all_data, restricted to one (year, quarter) slice
+    if csv_dir:
+        data = {}
+        for table in TABLES:
+            df = _read_csv_table(csv_dir, table)
+            data[table] = df[(df["Years"] == year) & (df["Quarter"] == quarter)]
+        return data
+
+    data = {}
+    conn = _connect()
+    try:
+        for table in TABLES:
+            df = pd.read_sql(f"SELECT * FROM {table} WHERE Years = %s AND Quarter = %s", conn, params=(int(year), int(quarter)))
+            data[table] = normalize_columns(table, df)
+    finally:
+        conn.close()
+    return data
+
+
+def load_dimensions(csv_dir=None):
+    # Only the sidebar choices (years, quarters, states), the (year, quarter) periods that have data and the
+    # distinct (state, district) pairs used for the district join index - cheap enough to run before any data is loaded
+    district_columns = {"States", "District", "Districts"}
+    if csv_dir:
+        df = pd.read_csv(os.path.join(csv_dir, "map_transaction.csv"), usecols=["Years", "Quarter", "States"]).drop_duplicates()
+        districts = pd.concat([
+            normalize_columns(table, pd.read_csv(os.path.join(csv_dir, f"{table}.csv"), usecols=lambda c: c in district_columns))
+            for table in ["map_transaction", "map_user"]
+        ])
+    else:
+        conn = _connect()
+        try:
+            df = pd.read_sql("SELECT DISTINCT Years, Quarter, States FROM map_transaction", conn)
+            districts = pd.read_sql(
+                "SELECT DISTINCT States, District AS Districts FROM map_transaction "
+                "UNION SELECT DISTINCT States, Districts FROM map_user", conn
+            )
+        finally:
+            conn.close()
+    districts = districts.assign(States=standardize_states(districts["States"]), Districts=districts["Districts"].str.title())
+    return {
+        "years": sorted(df["Years"].unique()),
+        "quarters": sorted(df["Quarter"].unique()),
+        "states": sorted(standardize_states(df["States"]).unique()),
+        "periods": sorted({(int(year), int(quarter)) for year, quarter in df[["Years", "Quarter"]].itertuples(index=False)}),
+        "districts": districts.drop_duplicates().sort_values(["States", "Districts"]).reset_index(drop=True)
+    }
+
+
+def data_version(data):
+    # Content hash of the loaded tables, used as the cache/ETag version
+    digest = hashlib.sha1()
+    for table in sorted(data):
+        df = data[table]
+        digest.update(table.encode())
+        digest.update(",".join(map(str, df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+#Dashboard categories, in display order
+CATEGORIES = ["Merchant payments", "Peer-to-peer payments", "Recharge & bill payments", "Financial Services", "Others"]
+CATEGORY_MEASURES = ["Transaction_count", "Transaction_amount"]
+
+
+def classify_transaction_type(transaction_type):
+    transaction_type_lower = transaction_type.lower()
+    if "merchant" in transaction_type_lower:
+        return "Merchant payments"
+    if "p2p" in transaction_type_lower or "peer-to-peer" in transaction_type_lower:
+        return "Peer-to-peer payments"
+    if "recharge" in transaction_type_lower or "bill" in transaction_type_lower:
+        return "Recharge & bill payments"
+    if "financial" in transaction_type_lower:
+        return "Financial Services"
+    return "Others"
+
+
+def build_category_matrix(aggre_transaction, years, quarters, states):
+    # Dense (Years, Quarter, States) x (measure, category) matrix; "All India" rows are the sum over states.
+    # Each distinct Transaction_type is classified once here instead of on every rerun.
+    type_to_category = {name: classify_transaction_type(name) for name in aggre_transaction["Transaction_type"].unique()}
+    by_state = aggre_transaction[aggre_transaction["States"] != "All India"]
+    matrix = by_state.assign(Category=by_state["Transaction_type"].map(type_to_category)).pivot_table(
+        index=["Years", "Quarter", "States"], columns="Category", values=CATEGORY_MEASURES, aggfunc="sum", fill_value=0
+    )
+    matrix = matrix.reindex(
+        index=pd.MultiIndex.from_product([years, quarters, states], names=["Years", "Quarter", "States"]),
+        columns=pd.MultiIndex.from_product([CATEGORY_MEASURES, CATEGORIES]),
+        fill_value=0
+    )
+    matrix = matrix.astype({("Transaction_count", category): "int64" for category in CATEGORIES})
+    national = matrix.groupby(level=["Years", "Quarter"]).sum()
+    national.index = pd.MultiIndex.from_tuples(
+        [(year, quarter, "All India") for year, quarter in national.index], names=["Years", "Quarter", "States"]
+    )
+    return pd.concat([matrix, national]).sort_index()
+
+
+def category_breakdown(category_matrix, key):
+    # {category: {"Transaction_count": .., "Transaction_amount": ..}} for one (year, quarter, state) row
+    if key not in category_matrix.index:
+        return {}
+    # Per measure, so counts keep their int64 dtype instead of being upcast with the amounts in one row
+    rows = {measure: category_matrix[measure].loc[key] for measure in CATEGORY_MEASURES}
+    return {category: {measure: rows[measure][category] for measure in CATEGORY_MEASURES} for category in CATEGORIES}
+
+
+#Pulse -> GeoJSON (NAME_2) district spellings that neither normalization nor fuzzy matching resolve,
+#keyed by (state, normalized Pulse name)
+DISTRICT_ALIASES = {
+    ("Karnataka", "bengaluru urban"): "Bangalore Urban",
+    ("Karnataka", "bengaluru rural"): "Bangalore Rural",
+    ("Karnataka", "mysuru"): "Mysore",
+    ("Karnataka", "belagavi"): "Belgaum",
+    ("Karnataka", "kalaburagi"): "Gulbarga",
+    ("Karnataka", "vijayapura"): "Bijapur",
+    ("Karnataka", "shivamogga"): "Shimoga",
+    ("Karnataka", "tumakuru"): "Tumkur",
+    ("Karnataka", "ballari"): "Bellary",
+    ("Karnataka", "chikkamagaluru"): "Chikmagalur",
+    ("Haryana", "gurugram"): "Gurgaon",
+    ("Haryana", "nuh"): "Mewat",
+    ("Uttar Pradesh", "prayagraj"): "Allahabad",
+    ("Uttar Pradesh", "ayodhya"): "Faizabad",
+    ("Odisha", "balasore"): "Baleshwar",
+    ("Maharashtra", "beed"): "Bid",
+    ("Maharashtra", "raigad"): "Raigarh",
+}
+FUZZY_CUTOFF = 0.85
+
+
+def normalize_name(name):
+    name = str(name).lower().replace("&", " and ")
+    name = re.sub(r"[^a-z0-9 ]", " ", name)
+    name = re.sub(r"\bdistrict\b", " ", name)
+    return " ".join(name.split())
+
+
+def index_district_features(district_geojson):
+    # Stable integer feature id (position in the file) stored as properties.FID, the key map joins use
+    for fid, feature in enumerate(district_geojson["features"]):
+        feature["properties"]["FID"] = fid
+    return district_geojson
+
+
+def build_district_index(district_geojson, districts):
+    # Resolve every (States, Districts) pair once to a GeoJSON feature id: exact normalized name within the
+    # state, then DISTRICT_ALIASES, then a fuzzy match. States missing from the GeoJSON (e.g. post-2011 splits)
+    # fall back to matching against every feature. Returns States, Districts, Feature_id (Int64, NA if unmatched).
+    by_state = {}
+    everything = {}
+    for fid, feature in enumerate(district_geojson["features"]):
+        properties = feature["properties"]
+        name = normalize_name(properties.get("NAME_2", ""))
+        by_state.setdefault(normalize_name(properties.get("NAME_1", "")), {})[name] = fid
+        everything.setdefault(name, fid)
+
+    rows = []
+    for state, district in districts[["States", "Districts"]].itertuples(index=False):
+        candidates = by_state.get(normalize_name(state)) or everything
+        name = normalize_name(district)
+        alias = DISTRICT_ALIASES.get((state, name))
+        if name in candidates:
+            rows.append([state, district, candidates[name]])
+        elif alias is not None and normalize_name(alias) in candidates:
+            rows.append([state, district, candidates[normalize_name(alias)]])
+        else:
+            rows.append([state, district, None])
+
+    # Fuzzy pass only over features nobody matched exactly, one district per feature, and never across a
+    # different number ("North 24 Parganas" vs "South 24 Parganas" is fine, "Zone 1" vs "Zone 2" is not).
+    # Candidate pairs are assigned best score first, so a district cannot take a feature a closer spelling needs.
+    claimed = {row[2] for row in rows if row[2] is not None}
+    pairs = []
+    for position, row in enumerate(rows):
+        if row[2] is not None:
+            continue
+        candidates = by_state.get(normalize_name(row[0])) or everything
+        name = normalize_name(row[1])
+        matcher = difflib.SequenceMatcher(b=name)
+        for candidate, fid in candidates.items():
+            if fid in claimed or re.findall(r"\d+", candidate) != re.findall(r"\d+", name):
+                continue
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() >= FUZZY_CUTOFF and matcher.quick_ratio() >= FUZZY_CUTOFF:
+                score = matcher.ratio()
+                if score >= FUZZY_CUTOFF:
+                    pairs.append((-score, position, fid))
+    for _, position, fid in sorted(pairs):
+        if rows[position][2] is None and fid not in claimed:
+            rows[position][2] = fid
+            claimed.add(fid)
+
+    index = pd.DataFrame(rows, columns=["States", "Districts", "Feature_id"])
+    index["Feature_id"] = index["Feature_id"].astype("Int64")
+    return index
+
+
+# Pre-aggregate-faster access
+#Measures of the joined users x transactions table and the ratios derived from them
+MEASURES = ["Transaction_count", "Transaction_amount", "RegisteredUser", "AppOpens"]
+RATIO_METRICS = {
+    # name: (numerator, denominator)
+    "Transactions_per_user": ("Transaction_count", "RegisteredUser"),
+    "AppOpens_per_user": ("AppOpens", "RegisteredUser"),
+    "Avg_ticket": ("Transaction_amount", "Transaction_count")
+}
+DISTRICT_METRICS = MEASURES + list(RATIO_METRICS)
+
+
+def add_ratio_metrics(df):
+    # A zero or missing denominator gives NaN (no value on the map) rather than inf
+    for name, (numerator, denominator) in RATIO_METRICS.items():
+        df[name] = df[numerator] / df[denominator].where(df[denominator] > 0)
+    return df
+
+
+def pre_aggregate_data(data, states=None, district_index=None, years=None, quarters=None):
+# years/quarters: periods to build keys for, even if they have no rows (default: the ones present in map_transaction)
+#apply mapping (on copies - the input frames may be shared cache entries)
+    Aggre_transaction, Map_transaction, Map_user, Top_transaction, Top_user = [
+        data[table].assign(States=standardize_states(data[table]["States"])) for table in TABLES
+    ]
+    Map_transaction["Districts"] = Map_transaction["Districts"].str.title()
+    Map_user["Districts"] = Map_user["Districts"].str.title()
+
+
+    map_transaction_state_dict = {}
+    map_transaction_district_dict = {}
+    top_transaction_dict = {}
+
+
+    map_user_state_dict = {}
+    map_user_district_dict = {}
+    top_user_dict = {}
+
+
+    state_metrics_dict = {}
+    district_metrics_dict = {}
+
+    if years is None:
+        years = sorted(Map_transaction["Years"].unique())
+    if quarters is None:
+        quarters = sorted(Map_transaction["Quarter"].unique())
+    if states is None:
+        states = sorted(Map_transaction["States"].unique())
+    states = [state for state in states if state != "All India"]
+
+
+    category_matrix = build_category_matrix(Aggre_transaction, years, quarters, states)
+
+
+    map_txn_grouped = Map_transaction.groupby(["Years", "Quarter", "States", "Districts"])[["Transaction_count", "Transaction_amount"]].sum().reset_index()
+    map_usr_grouped = Map_user.groupby(["Years", "Quarter", "States", "Districts"])[["RegisteredUser", "AppOpens"]].sum().reset_index()
+    #Users x transactions per district, joined once here so the ratio metrics are plain column reads
+    district_metrics = add_ratio_metrics(
+        map_txn_grouped.merge(map_usr_grouped, on=["Years", "Quarter", "States", "Districts"], how="outer")
+    )
+    #District -> feature id join, done once here so map rendering is an integer lookup
+    if district_index is not None:
+        feature_ids = district_index[["States", "Districts", "Feature_id"]]
+        map_txn_grouped = map_txn_grouped.merge(feature_ids, on=["States", "Districts"], how="left")
+        map_usr_grouped = map_usr_grouped.merge(feature_ids, on=["States", "Districts"], how="left")
+        district_metrics = district_metrics.merge(feature_ids, on=["States", "Districts"], how="left")
+    else:
+        for grouped in [map_txn_grouped, map_usr_grouped, district_metrics]:
+            grouped["Feature_id"] = pd.array([pd.NA] * len(grouped), dtype="Int64")
+    top_txn_grouped = Top_transaction.groupby(["Years", "Quarter", "States", "Pincodes"])["Transaction_count"].sum().reset_index()
+    top_usr_grouped = Top_user.groupby(["Years", "Quarter", "States", "Pincodes"])["RegisteredUser"].sum().reset_index()
+
+    for year in years:
+        for quarter in quarters:
+            map_txn = map_txn_grouped[(map_txn_grouped["Years"] == year) & (map_txn_grouped["Quarter"] == quarter)]
+            map_usr = map_usr_grouped[(map_usr_grouped["Years"] == year) & (map_usr_grouped["Quarter"] == quarter)]
+            top_txn = top_txn_grouped[(top_txn_grouped["Years"] == year) & (top_txn_grouped["Quarter"] == quarter)]
+            top_usr = top_usr_grouped[(top_usr_grouped["Years"] == year) & (top_usr_grouped["Quarter"] == quarter)]
+            metrics = district_metrics[(district_metrics["Years"] == year) & (district_metrics["Quarter"] == quarter)]
+
+            for state in states:
+                key = (year, quarter, state)
+
+                map_txn_state = map_txn[map_txn["States"] == state]
+                map_transaction_state_dict[key] = {
+                    "Transaction_count": map_txn_state["Transaction_count"].sum(),
+                    "Transaction_amount": map_txn_state["Transaction_amount"].sum()
+                }
+                map_transaction_district_dict[key] = map_txn_state[["Districts", "Feature_id", "Transaction_count", "Transaction_amount"]]
+
+
+                map_usr_state = map_usr[map_usr["States"] == state]
+                map_user_state_dict[key] = {
+                    "RegisteredUser": map_usr_state["RegisteredUser"].sum(),
+                    "AppOpens": map_usr_state["AppOpens"].sum()
+                }
+                map_user_district_dict[key] = map_usr_state[["Districts", "Feature_id", "RegisteredUser", "AppOpens"]]
+
+
+                top_txn_state = top_txn[top_txn["States"] == state]
+                top_transaction_dict[key] = top_txn_state[["Pincodes", "Transaction_count"]]
+
+
+                top_usr_state = top_usr[top_usr["States"] == state]
+                top_user_dict[key] = top_usr_state[["Pincodes", "RegisteredUser"]]
+
+
+                district_metrics_dict[key] = metrics.loc[metrics["States"] == state, ["Districts", "Feature_id"] + DISTRICT_METRICS]
+
+            key = (year, quarter, "All India")
+            map_transaction_state_dict[key] = map_txn.groupby("States")[["Transaction_count", "Transaction_amount"]].sum().reset_index()
+            map_transaction_district_dict[key] = map_txn[["Districts", "Feature_id", "Transaction_count", "Transaction_amount"]]
+            map_user_state_dict[key] = map_usr.groupby("States")[["RegisteredUser", "AppOpens"]].sum().reset_index()
+            map_user_district_dict[key] = map_usr[["Districts", "Feature_id", "RegisteredUser", "AppOpens"]]
+            top_transaction_dict[key] = top_txn[["Pincodes", "Transaction_count"]]
+            top_user_dict[key] = top_usr[["Pincodes", "RegisteredUser"]]
+            district_metrics_dict[key] = metrics[["Districts", "Feature_id"] + DISTRICT_METRICS]
+            state_metrics_dict[key] = add_ratio_metrics(metrics.groupby("States")[MEASURES].sum(min_count=1).reset_index())
+
+    return {
+        "category_matrix": category_matrix,
+        "map_transaction_state_dict": map_transaction_state_dict,
+        "map_transaction_district_dict": map_transaction_district_dict,
+        "map_user_state_dict": map_user_state_dict,
+        "map_user_district_dict": map_user_district_dict,
+        "top_transaction_dict": top_transaction_dict,
+        "top_user_dict": top_user_dict,
+        "state_metrics_dict": state_metrics_dict,
+        "district_metrics_dict": district_metrics_dict,
+        "years": years,
+        "quarters": quarters,
+        "states": states
+    }
+
+#GeoJSON for each state
+def pre_filter_district_geojson(district_geojson, states, district_index=None):
+    # With a district index, a state's map also gets the features its districts were matched to in other
+    # GeoJSON states (e.g. Telangana districts filed under Andhra Pradesh)
+    if district_geojson is None:
+        return None
+    filtered_geojson = {}
+    for state in states:
+        if state == "All India":
+            filtered_geojson[state] = district_geojson
+            continue
+        matched = set()
+        if district_index is not None:
+            matched = set(district_index.loc[district_index["States"] == state, "Feature_id"].dropna())
+        filtered_features = [
+            feature for feature in district_geojson["features"]
+            if normalize_name(feature["properties"]["NAME_1"]) == normalize_name(state)
+            or feature["properties"].get("FID") in matched
+        ]
+        filtered_geojson[state] = {
+            "type": "FeatureCollection",
+            "features": filtered_features
+        }
+    return filtered_geojson
+
+#Measures available in the comparison view, per category: (table, measures)
+COMPARE_MEASURES = {
+    "Transactions": ("map_transaction", ["Transaction_count", "Transaction_amount"]),
+    "Users": ("map_user", ["RegisteredUser", "AppOpens"])
+}
+
+
+def period_label(period):
+    # Periods are encoded as Years * 10 + Quarter so they sort and compare as plain integers
+    return f"Q{period % 10} {period // 10}"
+
+
+def build_region_timeseries(data, category, level):
+    # Long (Period, Region) frame over every quarter, grouped once. Share is the region's part of the first
+    # measure: of All India for states, of the parent state for districts.
+    table, measures = COMPARE_MEASURES[category]
+    df = data[table]
+    df = df.assign(States=standardize_states(df["States"]), Period=df["Years"] * 10 + df["Quarter"])
+    if level == "States":
+        long = df.groupby(["Period", "States"])[measures].sum().reset_index()
+        long["Region"] = long["States"]
+        parent_total = long.groupby("Period")[measures[0]].transform("sum")
+    else:
+        long = df.groupby(["Period", "States", "Districts"])[measures].sum().reset_index()
+        long["Region"] = long["Districts"].str.title() + ", " + long["States"]
+        parent_total = long.groupby(["Period", "States"])[measures[0]].transform("sum")
+    long["Share"] = long[measures[0]] / parent_total
+    return long[["Period", "Region"] + measures + ["Share"]]
+
+
+def compare_regions(timeseries, regions, start, end, measure):
+    # One boolean mask + pivot for all selected regions at once; results are Period x Region frames
+    selected = timeseries[timeseries["Region"].isin(regions) & timeseries["Period"].between(start, end)]
+    if selected.empty:
+        return None
+    values = selected.pivot(index="Period", columns="Region", values=measure).reindex(columns=regions)
+    share = selected.pivot(index="Period", columns="Region", values="Share").reindex(columns=regions) * 100
+    growth = values.pct_change(fill_method=None) * 100
+    first, last = values.iloc[0], values.iloc[-1]
+    summary = pd.DataFrame({
+        measure: last,
+        "QoQ growth %": growth.iloc[-1],
+        "Growth over range %": (last / first - 1) * 100,
+        "Share %": share.iloc[-1]
+    })
+    return {"values": values, "growth": growth, "share": share, "summary": summary}
+
+
+def build_search_index(data):
+    # Sorted-array prefix index over every district and pincode, built once from the full history.
+    # "history" holds each entity's quarters as one contiguous block, so a lookup is a single iloc slice.
+    map_txn = data["map_transaction"].assign(States=standardize_states(data["map_transaction"]["States"]))
+    map_usr = data["map_user"].assign(States=standardize_states(data["map_user"]["States"]))
+    top_txn = data["top_transaction"].dropna(subset=["Pincodes"])
+    top_usr = data["top_user"].dropna(subset=["Pincodes"])
+    top_txn = top_txn.assign(States=standardize_states(top_txn["States"]), Pincodes=top_txn["Pincodes"].astype("int64").astype(str))
+    top_usr = top_usr.assign(States=standardize_states(top_usr["States"]), Pincodes=top_usr["Pincodes"].astype("int64").astype(str))
+
+    keys = ["States", "Entity", "Years", "Quarter"]
+    districts = pd.merge(
+        map_txn.assign(Entity=map_txn["Districts"].str.title()).groupby(keys)[["Transaction_count", "Transaction_amount"]].sum(),
+        map_usr.assign(Entity=map_usr["Districts"].str.title()).groupby(keys)[["RegisteredUser", "AppOpens"]].sum(),
+        left_index=True, right_index=True, how="outer"
+    ).reset_index()
+    pincodes = pd.merge(
+        top_txn.rename(columns={"Pincodes": "Entity"}).groupby(keys)[["Transaction_count", "Transaction_amount"]].sum(),
+        top_usr.rename(columns={"Pincodes": "Entity"}).groupby(keys)[["RegisteredUser"]].sum(),
+        left_index=True, right_index=True, how="outer"
+    ).reset_index()
+    history = pd.concat([districts.assign(Kind="District"), pincodes.assign(Kind="Pincode")], ignore_index=True)
+    history = history.sort_values(["Kind", "States", "Entity", "Years", "Quarter"]).reset_index(drop=True)
+
+    positions = {
+        entity: (rows[0], rows[-1] + 1)
+        for entity, rows in history.groupby(["Kind", "States", "Entity"], sort=False).indices.items()
+    }
+    entries = sorted((normalize_name(entity[2]), entity) for entity in positions)
+    return {
+        "keys": [key for key, _ in entries],
+        "entities": [entity for _, entity in entries],
+        "positions": positions,
+        "history": history
+    }
+
+
+def search_entities(search_index, query, limit=10):
+    # (Kind, States, Entity) tuples whose normalized name starts with the query
+    prefix = normalize_name(query)
+    if not prefix:
+        return []
+    keys = search_index["keys"]
+    results = []
+    for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+        if len(results) == limit or not keys[i].startswith(prefix):
+            break
+        results.append(search_index["entities"][i])
+    return results
+
+
+def entity_history(search_index, entity):
+    start, stop = search_index["positions"][entity]
+    return search_index["history"].iloc[start:stop].dropna(axis=1, how="all")
+
+
+EXPORT_FORMATS = ["csv", "parquet"]
+
+
+def parse_period(text):
+    # "2023Q4" / "2023-Q4" -> 20234 (Years * 10 + Quarter)
+    match = re.fullmatch(r"(\d{4})-?Q([1-4])", text.strip().upper())
+    if match is None:
+        raise ValueError(f"invalid quarter {text!r}, expected e.g. 2023Q4")
+    return int(match.group(1)) * 10 + int(match.group(2))
+
+
+def raw_state_names(state):
+    # Names a standardized state can have in the raw tables (the ETL writes pre-STATE_MAPPING names)
+    return [state] + [raw for raw, mapped in STATE_MAPPING.items() if mapped == state]
+
+
+def iter_slice(table, state=None, start=None, end=None, csv_dir=None, chunksize=100_000):
+    # Yields DataFrame chunks of one table filtered by state and an inclusive period range, without ever
+    # holding the whole result in memory. An empty slice still yields one empty chunk with the table's columns.
+    if csv_dir:
+        empty = None
+        for chunk in pd.read_csv(os.path.join(csv_dir, f"{table}.csv"), chunksize=chunksize):
+            chunk = normalize_columns(table, chunk)
+            mask = pd.Series(True, index=chunk.index)
+            if state and state != "All India":
+                mask &= standardize_states(chunk["States"]) == state
+            period = chunk["Years"] * 10 + chunk["Quarter"]
+            if start is not None:
+                mask &= period >= start
+            if end is not None:
+                mask &= period <= end
+            if mask.any():
+                yield chunk[mask]
+                empty = False
+            elif empty is None:
+                empty = chunk.iloc[:0]
+        if empty is not False:
+            yield empty if empty is not None else normalize_columns(table, pd.read_csv(os.path.join(csv_dir, f"{table}.csv"), nrows=0))
+        return
+
+    conditions, params = [], []
+    if state and state != "All India":
+        names = raw_state_names(state)
+        conditions.append("States IN (" + ", ".join(["%s"] * len(names)) + ")")
+        params.extend(names)
+    if start is not None:
+        conditions.append("(Years, Quarter) >= (%s, %s)")
+        params.extend(divmod(start, 10))
+    if end is not None:
+        conditions.append("(Years, Quarter) <= (%s, %s)")
+        params.extend(divmod(end, 10))
+    query = f"SELECT * FROM {table}" + (" WHERE " + " AND ".join(conditions) if conditions else "")
+    conn = _connect()
+    try:
+        for chunk in pd.read_sql(query, conn, params=params, chunksize=chunksize):
+            yield normalize_columns(table, chunk)
+    finally:
+        conn.close()
+
+
+def write_chunks(chunks, output, fmt):
+    # Streams chunks into a CSV or Parquet file (path or binary file object); returns the row count.
+    # Empty chunks still write the header / schema, so an empty slice gives a valid empty file.
+    rows = 0
+    if fmt == "csv":
+        handle = open(output, "w", newline="", encoding="utf-8") if isinstance(output, str) else io.TextIOWrapper(output, encoding="utf-8", newline="", write_through=True)
+        try:
+            header = True
+            for chunk in chunks:
+                chunk.to_csv(handle, index=False, header=header)
+                header = False
+                rows += len(chunk)
+        finally:
+            if isinstance(output, str):
+                handle.close()
+            else:
+                handle.detach()
+        return rows
+
+    if fmt != "parquet":
+        raise ValueError(f"unknown export format: {fmt}")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                batch = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(output, batch.schema)
+            else:
+                # Later chunks are cast to the first chunk's schema so all row groups match
+                batch = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(batch)
+            rows += len(chunk)
+        if writer is None:
+            pq.write_table(pa.table({}), output)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+#Ad-hoc aggregate queries ("Explore special data points"). Only whitelisted tables, columns and aggregates
+#reach the SQL; every filter value is a bound parameter.
+QUERY_COLUMNS = {
+    # table: (dimensions, measures)
+    "aggregated_transaction": (["States", "Years", "Quarter", "Transaction_type"], ["Transaction_count", "Transaction_amount"]),
+    "map_transaction": (["States", "Years", "Quarter", "Districts"], ["Transaction_count", "Transaction_amount"]),
+    "map_user": (["States", "Years", "Quarter", "Districts"], ["RegisteredUser", "AppOpens"]),
+    "top_transaction": (["States", "Years", "Quarter", "Pincodes"], ["Transaction_count", "Transaction_amount"]),
+    "top_user": (["States", "Years", "Quarter", "Pincodes"], ["RegisteredUser"])
+}
+QUERY_AGGREGATES = {"sum": "SUM", "mean": "AVG", "min": "MIN", "max": "MAX"}
+QUERY_ROW_CAP = 5_000
+QUERY_TIMEOUT_S = 15
+
+QUERY_WORKERS = 2
+
+#At most QUERY_WORKERS ad-hoc queries run at once per process, whatever the number of sessions. A slot is held
+#until the query really finishes: a timed-out CSV query keeps running in its thread, so while every slot is
+#taken new queries are rejected instead of queueing behind it and timing out as well.
+_query_pool = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="phonepe-query")
+_query_slots = threading.BoundedSemaphore(QUERY_WORKERS)
+
+
+class QueryBusyError(RuntimeError):
+    pass
+
+
+def normalize_query(table, dimensions, measures, aggregate="sum", states=(), start=None, end=None):
+    # Validated, canonical (hashable) form of a query: columns in whitelist order, states sorted, so equivalent
+    # requests share one cache entry
+    if table not in QUERY_COLUMNS:
+        raise ValueError(f"unknown table: {table}")
+    allowed_dimensions, allowed_measures = QUERY_COLUMNS[table]
+    unknown = (set(dimensions) - set(allowed_dimensions)) | (set(measures) - set(allowed_measures))
+    if unknown:
+        raise ValueError(f"unknown column(s) for {table}: {', '.join(sorted(unknown))}")
+    if not dimensions or not measures:
+        raise ValueError("pick at least one dimension and one measure")
+    if aggregate not in QUERY_AGGREGATES:
+        raise ValueError(f"unknown aggregate: {aggregate}")
+    states = tuple(sorted(set(states) - {"All India"}))
+    return (
+        table,
+        tuple(c for c in allowed_dimensions if c in dimensions),
+        tuple(c for c in allowed_measures if c in measures),
+        aggregate,
+        states,
+        None if start is None else int(start),
+        None if end is None else int(end)
+    )
+
+
+def query_sql(query, row_cap=QUERY_ROW_CAP, timeout=QUERY_TIMEOUT_S):
+    # One parameterized aggregate query. The inner select standardizes state names (MySQL holds the raw ones)
+    # and filters on the raw columns so the (Years, Quarter, States) index is usable.
+    table, dimensions, measures, aggregate, states, start, end = query
+    raw = {"Districts": "District"} if table == "map_transaction" else {}
+    state_case = "CASE States " + " ".join(["WHEN %s THEN %s"] * len(STATE_MAPPING)) + " ELSE States END"
+    inner, params = [], []
+    for column in dimensions + measures:
+        if column == "States":
+            inner.append(f"{state_case} AS States")
+            params.extend(value for pair in STATE_MAPPING.items() for value in pair)
+        else:
+            inner.append(f"{raw.get(column, column)} AS {column}")
+
+    conditions = []
+    if states:
+        names = [name for state in states for name in raw_state_names(state)]
+        conditions.append("States IN (" + ", ".join(["%s"] * len(names)) + ")")
+        params.extend(names)
+    if start is not None:
+        conditions.append("(Years, Quarter) >= (%s, %s)")
+        params.extend(divmod(start, 10))
+    if end is not None:
+        conditions.append("(Years, Quarter) <= (%s, %s)")
+        params.extend(divmod(end, 10))
+
+    function = QUERY_AGGREGATES[aggregate]
+    outer = list(dimensions) + [f"{function}({m}) AS {m}" for m in measures]
+    sql = (
+        f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout * 1000)}) */ {', '.join(outer)} "
+        f"FROM (SELECT {', '.join(inner)} FROM {table}"
+        + (" WHERE " + " AND ".join(conditions) if conditions else "")
+        + f") AS t GROUP BY {', '.join(dimensions)} ORDER BY {measures[0]} DESC LIMIT %s"
+    )
+    params.append(row_cap + 1)
+    return sql, params
+
+
+def _query_frame(query, csv_dir, row_cap):
+    # pandas equivalent of query_sql over the cached CSV tables
+    table, dimensions, measures, aggregate, states, start, end = query
+    df = _read_csv_table(csv_dir, table)
+    df = df.assign(States=standardize_states(df["States"]))
+    mask = pd.Series(True, index=df.index)
+    if states:
+        mask &= df["States"].isin(states)
+    period = df["Years"] * 10 + df["Quarter"]
+    if start is not None:
+        mask &= period >= start
+    if end is not None:
+        mask &= period <= end
+    df = df[mask]
+    if "Districts" in dimensions:
+        df = df.assign(Districts=df["Districts"].str.title())
+    result = df.groupby(list(dimensions))[list(measures)].agg(aggregate).reset_index()
+    return result.sort_values(measures[0], ascending=False).head(row_cap + 1)
+
+
+def _query_mysql(query, row_cap, timeout):
+    sql, params = query_sql(query, row_cap, timeout)
+    conn = _connect()
+    try:
+        result = pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+    if "Districts" in result:
+        result["Districts"] = result["Districts"].str.title()
+    return result
+
+
+def run_query(query, csv_dir=None, row_cap=QUERY_ROW_CAP, timeout=QUERY_TIMEOUT_S):
+    # Runs a normalize_query() result and returns (DataFrame, truncated). Raises TimeoutError after `timeout`
+    # seconds instead of blocking the caller (MySQL also stops the statement itself via MAX_EXECUTION_TIME).
+    # Raises QueryBusyError straight away when QUERY_WORKERS queries are still running.
+    if not _query_slots.acquire(blocking=False):
+        raise QueryBusyError("the query workers are busy with other queries, try again in a moment")
+    try:
+        if csv_dir:
+            future = _query_pool.submit(_query_frame, query, csv_dir, row_cap)
+        else:
+            future = _query_pool.submit(_query_mysql, query, row_cap, timeout)
+    except BaseException:
+        _query_slots.release()
+        raise
+    future.add_done_callback(lambda _: _query_slots.release())
+    try:
+        result = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(f"query did not finish within {timeout:g}s, narrow the filters or group by fewer columns")
+    return result.head(row_cap).reset_index(drop=True), len(result) > row_cap
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+
+import data_phonepe
+
+# Chunked export of one table slice to CSV or Parquet, the same path the dashboard's download uses.
+#   python export_phonepe.py map_transaction --state Karnataka --from 2022Q1 --to 2023Q4 -o karnataka.parquet
+#   python export_phonepe.py map_user -o all_districts.csv          # All India x all quarters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a filtered PhonePe Pulse table slice")
+    parser.add_argument("table", choices=data_phonepe.TABLES)
+    parser.add_argument("--state", help="standardized state name as shown in the dashboard (default: All India)")
+    parser.add_argument("--from", dest="start", help="first quarter, e.g. 2022Q1")
+    parser.add_argument("--to", dest="end", help="last quarter, e.g. 2023Q4")
+    parser.add_argument("-o", "--output", required=True, help="output file; format from extension unless --format")
+    parser.add_argument("--format", choices=data_phonepe.EXPORT_FORMATS)
+    parser.add_argument("--csv-dir", default=os.environ.get("PHONEPE_CSV_DIR"),
+                        help="read tables from <table>.csv files instead of MySQL")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in data_phonepe.EXPORT_FORMATS:
+        parser.error("cannot infer the format from the output name, pass --format")
+
+    try:
+        start = data_phonepe.parse_period(args.start) if args.start else None
+        end = data_phonepe.parse_period(args.end) if args.end else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    chunks = data_phonepe.iter_slice(
+        args.table,
+        state=args.state,
+        start=start,
+        end=end,
+        csv_dir=args.csv_dir,
+        chunksize=args.chunksize
+    )
+    try:
+        rows = data_phonepe.write_chunks(chunks, args.output, fmt)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {rows:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
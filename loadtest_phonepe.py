@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Multi-user load test for stream_phonepe.py, driven headlessly through Streamlit's AppTest.
+#   python loadtest_phonepe.py make-fixture fixtures/
+#   python loadtest_phonepe.py run fixtures/ --users 20 --reruns 25
+#   python loadtest_phonepe.py run fixtures/ --users 20 --baseline last.json --max-regression 0.2
+#
+# "threads" mode keeps every session in one process, sharing st.cache_data like a single Streamlit server.
+# "processes" mode runs one user per process to see the per-process memory of a cold session.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(REPO_DIR, "stream_phonepe.py")
+#Threads mode patches private Streamlit internals (see _share_server_state); it is only tested against this release
+TESTED_STREAMLIT = "1.66"
+
+FIXTURE_STATES = ["Karnataka", "Maharashtra", "Tamil Nadu", "Uttar Pradesh", "West Bengal", "Gujarat", "Rajasthan", "Kerala"]
+FIXTURE_TYPES = ["Merchant payments", "Peer-to-peer payments", "Recharge & bill payments", "Financial Services", "Others"]
+
+
+def _square(x, y, size=1.0):
+    return {"type": "Polygon", "coordinates": [[[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]]}
+
+
+def make_fixture(out_dir, districts_per_state=20, pincodes_per_state=50, years=(2020, 2021, 2022, 2023), seed=7):
+    # Synthetic tables in the dashboard's schema plus matching square-grid GeoJSON
+    import pandas as pd
+
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    rows = {name: [] for name in ["aggregated_transaction", "map_transaction", "map_user", "top_transaction", "top_user"]}
+    state_features, district_features = [], []
+
+    for s, state in enumerate(FIXTURE_STATES):
+        state_features.append({"type": "Feature", "properties": {"ST_NM": state}, "geometry": _square(70 + s * 2, 10, 2)})
+        districts = [f"{state} District {d + 1}" for d in range(districts_per_state)]
+        for d, district in enumerate(districts):
+            district_features.append({
+                "type": "Feature",
+                "properties": {"NAME_1": state, "NAME_2": district.title()},
+                "geometry": _square(70 + s * 2 + (d % 5) * 0.4, 10 + (d // 5) * 0.4, 0.4)
+            })
+        pincodes = [560000 + s * 1000 + p for p in range(pincodes_per_state)]
+
+        for year in years:
+            for quarter in range(1, 5):
+                base = dict(States=state, Years=year, Quarter=quarter)
+                for name in FIXTURE_TYPES:
+                    count = rng.randint(10**5, 10**7)
+                    rows["aggregated_transaction"].append(dict(base, Transaction_type=name, Transaction_count=count,
+                                                               Transaction_amount=count * rng.randint(100, 3000)))
+                for district in districts:
+                    count = rng.randint(10**4, 10**6)
+                    rows["map_transaction"].append(dict(base, District=district.lower(), Transaction_count=count,
+                                                        Transaction_amount=float(count * rng.randint(100, 3000))))
+                    users = rng.randint(10**3, 10**5)
+                    rows["map_user"].append(dict(base, Districts=district.lower(), RegisteredUser=users,
+                                                 AppOpens=users * rng.randint(5, 40)))
+                for pincode in pincodes:
+                    count = rng.randint(10**3, 10**5)
+                    rows["top_transaction"].append(dict(base, Pincodes=pincode, Transaction_count=count,
+                                                        Transaction_amount=count * rng.randint(100, 3000)))
+                    rows["top_user"].append(dict(base, Pincodes=pincode, RegisteredUser=rng.randint(100, 10**4)))
+
+    for table, table_rows in rows.items():
+        pd.DataFrame(table_rows).to_csv(os.path.join(out_dir, f"{table}.csv"), index=False)
+    with open(os.path.join(out_dir, "india_states.geojson"), "w") as f:
+        json.dump({"type": "FeatureCollection", "features": state_features}, f)
+    with open(os.path.join(out_dir, "india_district.geojson"), "w") as f:
+        json.dump({"type": "FeatureCollection", "features": district_features}, f)
+
+
+def _selectbox(at, label):
+    for box in at.selectbox:
+        if box.label == label:
+            return box
+    raise LookupError(f"no selectbox labelled {label!r}")
+
+
+def _check_run(at, user_id):
+    # A script that fails to compile comes back as an empty tree with no exception
+    if at.exception:
+        raise RuntimeError(f"user {user_id}: {at.exception[0].message}")
+    if not at.selectbox:
+        raise RuntimeError(f"user {user_id}: the run rendered nothing")
+
+
+def _share_server_state():
+    # AppTest is built for one session at a time. Threaded sessions share what one Streamlit server would share:
+    # - the script bytecode: AppTest compiles the script on every run, and concurrent ast.parse calls can fail on
+    #   CPython 3.11 ("AST constructor recursion depth mismatch"), which comes back as an empty run
+    # - the Runtime singleton: AppTest installs a mock Runtime per run and clears it when the run ends, which
+    #   pulls it out from under the other sessions ("Runtime hasn't been created!")
+    # - the global.appTest config override: each run patches config.get_option and restores it on exit, so a
+    #   session that finishes first switches it off for the others (their widgets then fail with KeyError '$$ID-..')
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    import streamlit
+    if streamlit.__version__.split(".")[:2] != TESTED_STREAMLIT.split("."):
+        raise RuntimeError(
+            f"threads mode is only tested with streamlit {TESTED_STREAMLIT}.x (found {streamlit.__version__}); "
+            "install that version or use --mode processes"
+        )
+    from streamlit import config
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.bidi_component_registry = BidiComponentManager()
+    Runtime._instance = runtime
+    #AppTest's per-run install/clear now goes to a stand-in
+    app_test.Runtime = SimpleNamespace(_instance=None)
+
+    #Every per-run patch then saves and restores an equivalent override
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+
+
+def simulate_user(user_id, reruns, seed):
+    # One session: initial load, then `reruns` random sidebar changes. Returns per-rerun latencies in ms.
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + user_id)
+    at = AppTest.from_file(SCRIPT, default_timeout=300)
+    latencies = []
+
+    start = time.perf_counter()
+    at.run()
+    latencies.append((time.perf_counter() - start) * 1000)
+    _check_run(at, user_id)
+
+    for _ in range(reruns):
+        label = rng.choice(["Category", "Region", "Year", "Quarter"])
+        box = _selectbox(at, label)
+        box.select(rng.choice(box.options))
+        start = time.perf_counter()
+        at.run()
+        latencies.append((time.perf_counter() - start) * 1000)
+        _check_run(at, user_id)
+
+    return latencies, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _init_process(fixture_dir):
+    os.chdir(fixture_dir)
+    os.environ["PHONEPE_CSV_DIR"] = fixture_dir
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+
+
+def run_load_test(fixture_dir, users, reruns, mode="threads", seed=0):
+    fixture_dir = os.path.abspath(fixture_dir)
+    if mode == "threads":
+        _init_process(fixture_dir)
+        _share_server_state()
+        executor = ThreadPoolExecutor(max_workers=users)
+    else:
+        executor = ProcessPoolExecutor(max_workers=users, initializer=_init_process, initargs=(fixture_dir,))
+
+    wall_start = time.perf_counter()
+    with executor:
+        results = list(executor.map(simulate_user, range(users), [reruns] * users, [seed] * users))
+    wall_s = time.perf_counter() - wall_start
+
+    latencies = [ms for user_latencies, _ in results for ms in user_latencies]
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "mode": mode,
+        "users": users,
+        "reruns_per_user": reruns,
+        "runs": len(latencies),
+        "wall_s": round(wall_s, 3),
+        "throughput_runs_per_s": round(len(latencies) / wall_s, 2),
+        "p50_ms": round(cuts[49], 1),
+        "p95_ms": round(cuts[94], 1),
+        "p99_ms": round(cuts[98], 1),
+        "max_ms": round(max(latencies), 1),
+        "peak_rss_mb_per_process": sorted({round(rss, 1) for _, rss in results}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test stream_phonepe.py with simulated users")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fixture = sub.add_parser("make-fixture", help="write a synthetic CSV + GeoJSON data fixture")
+    fixture.add_argument("out_dir")
+    fixture.add_argument("--districts-per-state", type=int, default=20)
+    fixture.add_argument("--pincodes-per-state", type=int, default=50)
+
+    run = sub.add_parser("run", help="drive the app with N simulated users")
+    run.add_argument("fixture_dir")
+    run.add_argument("--users", type=int, default=10)
+    run.add_argument("--reruns", type=int, default=20, help="sidebar changes per user after the first load")
+    run.add_argument("--mode", choices=["threads", "processes"], default="threads")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="write the report as JSON")
+    run.add_argument("--baseline", help="earlier JSON report to compare p95 against")
+    run.add_argument("--max-regression", type=float, default=0.2, help="allowed relative p95 increase over the baseline")
+    args = parser.parse_args()
+
+    if args.command == "make-fixture":
+        make_fixture(args.out_dir, args.districts_per_state, args.pincodes_per_state)
+        print(f"Fixture written to {args.out_dir}")
+        return
+
+    report = run_load_test(args.fixture_dir, args.users, args.reruns, args.mode, args.seed)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        allowed = baseline["p95_ms"] * (1 + args.max_regression)
+        if report["p95_ms"] > allowed:
+            print(f"p95 regression: {report['p95_ms']} ms > {allowed:.1f} ms allowed (baseline {baseline['p95_ms']} ms)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,464 +1,574 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import time
+from multiprocessing import Process
+
+import pandas as pd
+
+import snapshot_phonepe
+
+# PhonePe Pulse ETL, split into (dataset, state) shards claimed from a shared SQLite work queue.
+# Any number of workers on any number of hosts can point at the same --work-dir (queue + shard outputs);
+# failed or abandoned shards are retried, and `merge` concatenates the shard outputs deterministically.
+#
+#   python phonepe.py init   --data-dir <pulse>/data --work-dir work/
+#   python phonepe.py worker --data-dir <pulse>/data --work-dir work/        # run on as many hosts as you like
+#   python phonepe.py merge  --work-dir work/ --out csv/                     # one <table>.csv per table
+#   python phonepe.py load   --csv-dir csv/                                  # into MySQL
+#   python phonepe.py run    --data-dir <pulse>/data --work-dir work/ --out csv/ --workers 4   # all of the above locally
+#
+# With --snapshot-root instead of --out, every merge publishes an immutable snapshot (see snapshot_phonepe.py);
+# `snapshots`, `activate <id>` and `gc --keep N` manage them.
+
 # Paths
 base_path = r"D:\pulse-master (1)new\pulse-master\data"
 
-# Aggregated Insurance
-path7 = os.path.join(base_path, "aggregated/insurance/country/india/state/")
-agg_insur_list = os.listdir(path7)
-columns7 = {"States": [], "Years": [], "Quarter": [], "Insurance_type": [], "Insurance_count": [], "Insurance_amount": []}
+MAX_ATTEMPTS = 3
+LEASE_SECONDS = 600
 
-for state in agg_insur_list:
-    cur_states = os.path.join(path7, state, "")
-    agg_year_list = os.listdir(cur_states)
-    
-    for year in agg_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        agg_file_list = os.listdir(cur_years)
-
-        for file in agg_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                A = json.load(data)
-
-            for i in A["data"]["transactionData"]:
-                name = i["name"]
-                count = i["paymentInstruments"][0]["count"]
-                amount = i["paymentInstruments"][0]["amount"]
-                columns7["Insurance_type"].append(name)
-                columns7["Insurance_count"].append(count)
-                columns7["Insurance_amount"].append(amount)
-                columns7["States"].append(state)
-                columns7["Years"].append(year)
-                columns7["Quarter"].append(int(file.strip(".json")))
-
-aggre_insurance = pd.DataFrame(columns7)
-aggre_insurance["States"] = aggre_insurance["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-aggre_insurance["States"] = aggre_insurance["States"].str.replace("-", " ")
-aggre_insurance["States"] = aggre_insurance["States"].str.title()
-aggre_insurance['States'] = aggre_insurance['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-# Aggregated Transaction
-path1 = os.path.join(base_path, "aggregated/transaction/country/india/state/")
-agg_tran_list = os.listdir(path1)
-columns1 = {"States": [], "Years": [], "Quarter": [], "Transaction_type": [], "Transaction_count": [], "Transaction_amount": []}
-
-for state in agg_tran_list:
-    cur_states = os.path.join(path1, state, "")
-    agg_year_list = os.listdir(cur_states)
-    
-    for year in agg_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        agg_file_list = os.listdir(cur_years)
-
-        for file in agg_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                B = json.load(data)
-
-            for i in B["data"]["transactionData"]:
-                name = i["name"]
-                count = i["paymentInstruments"][0]["count"]
-                amount = i["paymentInstruments"][0]["amount"]
-                columns1["Transaction_type"].append(name)
-                columns1["Transaction_count"].append(count)
-                columns1["Transaction_amount"].append(amount)
-                columns1["States"].append(state)
-                columns1["Years"].append(year)
-                columns1["Quarter"].append(int(file.strip(".json")))
-
-aggre_transaction = pd.DataFrame(columns1)
-aggre_transaction["States"] = aggre_transaction["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-aggre_transaction["States"] = aggre_transaction["States"].str.replace("-", " ")
-aggre_transaction["States"] = aggre_transaction["States"].str.title()
-aggre_transaction['States'] = aggre_transaction['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-# Aggregated User
-path2 = os.path.join(base_path, "aggregated/user/country/india/state/")
-agg_user_list = os.listdir(path2)
-columns2 = {"States": [], "Years": [], "Quarter": [], "Brands": [], "Transaction_count": [], "Percentage": []}
-
-for state in agg_user_list:
-    cur_states = os.path.join(path2, state, "")
-    agg_year_list = os.listdir(cur_states)
-    
-    for year in agg_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        agg_file_list = os.listdir(cur_years)
-        
-        for file in agg_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                C = json.load(data)
+#Data quality: rows or files failing these checks are quarantined instead of loaded
+FIRST_YEAR = 2018
+MEASURE_UPPER_BOUNDS = {"Percentage": 1}
+#Errors that mean "this file is malformed" (quarantine it) rather than "the shard could not be read" (retry)
+MALFORMED_FILE_ERRORS = (ValueError, KeyError, TypeError, IndexError, AttributeError)
 
-            try:
-                for i in C["data"]["usersByDevice"]:
-                    brand = i["brand"]
-                    count = i["count"]
-                    percentage = i["percentage"]
-                    columns2["Brands"].append(brand)
-                    columns2["Transaction_count"].append(count)
-                    columns2["Percentage"].append(percentage)
-                    columns2["States"].append(state)
-                    columns2["Years"].append(year)
-                    columns2["Quarter"].append(int(file.strip(".json")))
-            except:
-                pass
-
-aggre_user = pd.DataFrame(columns2)
-aggre_user["States"] = aggre_user["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-aggre_user["States"] = aggre_user["States"].str.replace("-", " ")
-aggre_user["States"] = aggre_user["States"].str.title()
-aggre_user['States'] = aggre_user['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-
-# Map Insurance
-path8 = os.path.join(base_path, "map/insurance/hover/country/india/state/")
-map_insur_list = os.listdir(path8)
-columns8 = {"States": [], "Years": [], "Quarter": [], "Districts": [], "Transaction_count": [], "Transaction_amount": []}
-
-for state in map_insur_list:
-    cur_states = os.path.join(path8, state, "")
-    agg_year_list = os.listdir(cur_states)
-    
-    for year in agg_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        agg_file_list = os.listdir(cur_years)
-
-        for file in agg_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                D = json.load(data)
-
-            for i in D["data"]["hoverDataList"]:
-                name = i["name"]
-                count = i["metric"][0]["count"]
-                amount = i["metric"][0]["amount"]
-                columns8["Districts"].append(name)
-                columns8["Transaction_count"].append(count)
-                columns8["Transaction_amount"].append(amount)
-                columns8["States"].append(state)
-                columns8["Years"].append(year)
-                columns8["Quarter"].append(int(file.strip(".json")))
-
-map_insurance = pd.DataFrame(columns8)
-map_insurance["States"] = map_insurance["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-map_insurance["States"] = map_insurance["States"].str.replace("-", " ")
-map_insurance["States"] = map_insurance["States"].str.title()
-map_insurance['States'] = map_insurance['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-# Map Transaction
-path3 = os.path.join(base_path, "map/transaction/hover/country/india/state/")
-map_tran_list = os.listdir(path3)
-columns3 = {"States": [], "Years": [], "Quarter": [], "District": [], "Transaction_count": [], "Transaction_amount": []}
-
-for state in map_tran_list:
-    cur_states = os.path.join(path3, state, "")
-    map_year_list = os.listdir(cur_states)
-    
-    for year in map_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        map_file_list = os.listdir(cur_years)
-        
-        for file in map_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                E = json.load(data)
-
-            for i in E['data']["hoverDataList"]:
-                name = i["name"]
-                count = i["metric"][0]["count"]
-                amount = i["metric"][0]["amount"]
-                columns3["District"].append(name)
-                columns3["Transaction_count"].append(count)
-                columns3["Transaction_amount"].append(amount)
-                columns3["States"].append(state)
-                columns3["Years"].append(year)
-                columns3["Quarter"].append(int(file.strip(".json")))
-
-map_transaction = pd.DataFrame(columns3)
-map_transaction["States"] = map_transaction["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-map_transaction["States"] = map_transaction["States"].str.replace("-", " ")
-map_transaction["States"] = map_transaction["States"].str.title()
-map_transaction['States'] = map_transaction['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-# Map User
-path4 = os.path.join(base_path, "map/user/hover/country/india/state/")
-map_user_list = os.listdir(path4)
-columns4 = {"States": [], "Years": [], "Quarter": [], "Districts": [], "RegisteredUser": [], "AppOpens": []}
-
-for state in map_user_list:
-    cur_states = os.path.join(path4, state, "")
-    map_year_list = os.listdir(cur_states)
-    
-    for year in map_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        map_file_list = os.listdir(cur_years)
-        
-        for file in map_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                F = json.load(data)
-
-            for i in F["data"]["hoverData"].items():
-                district = i[0]
-                registeredusers = i[1]["registeredUsers"]
-                appopens = i[1]["appOpens"]
-                columns4["Districts"].append(district)
-                columns4["RegisteredUser"].append(registeredusers)
-                columns4["AppOpens"].append(appopens)
-                columns4["States"].append(state)
-                columns4["Years"].append(year)
-                columns4["Quarter"].append(int(file.strip(".json")))
-
-map_user = pd.DataFrame(columns4)
-map_user["States"] = map_user["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-map_user["States"] = map_user["States"].str.replace("-", " ")
-map_user["States"] = map_user["States"].str.title()
-map_user['States'] = map_user['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-# Top Insurance
-path9 = os.path.join(base_path, "top/insurance/country/india/state/")
-top_insur_list = os.listdir(path9)
-columns9 = {"States": [], "Years": [], "Quarter": [], "Pincodes": [], "Transaction_count": [], "Transaction_amount": []}
-
-for state in top_insur_list:
-    cur_states = os.path.join(path9, state, "")
-    top_year_list = os.listdir(cur_states)
-
-    for year in top_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        top_file_list = os.listdir(cur_years)
-
-        for file in top_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                G = json.load(data)
-
-            for i in G["data"]["pincodes"]:
-                entityName = i["entityName"]
-                count = i["metric"]["count"]
-                amount = i["metric"]["amount"]
-                columns9["Pincodes"].append(entityName)
-                columns9["Transaction_count"].append(count)
-                columns9["Transaction_amount"].append(amount)
-                columns9["States"].append(state)
-                columns9["Years"].append(year)
-                columns9["Quarter"].append(int(file.strip(".json")))
-
-top_insur = pd.DataFrame(columns9)
-top_insur["States"] = top_insur["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-top_insur["States"] = top_insur["States"].str.replace("-", " ")
-top_insur["States"] = top_insur["States"].str.title()
-top_insur['States'] = top_insur['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-# Top Transaction
-path5 = os.path.join(base_path, "top/transaction/country/india/state/")
-top_tran_list = os.listdir(path5)
-columns5 = {"States": [], "Years": [], "Quarter": [], "Pincodes": [], "Transaction_count": [], "Transaction_amount": []}
-
-for state in top_tran_list:
-    cur_states = os.path.join(path5, state, "")
-    top_year_list = os.listdir(cur_states)
-    
-    for year in top_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        top_file_list = os.listdir(cur_years)
-        
-        for file in top_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                H = json.load(data)
-
-            for i in H["data"]["pincodes"]:
-                entityName = i["entityName"]
-                count = i["metric"]["count"]
-                amount = i["metric"]["amount"]
-                columns5["Pincodes"].append(entityName)
-                columns5["Transaction_count"].append(count)
-                columns5["Transaction_amount"].append(amount)
-                columns5["States"].append(state)
-                columns5["Years"].append(year)
-                columns5["Quarter"].append(int(file.strip(".json")))
-
-top_transaction = pd.DataFrame(columns5)
-top_transaction["States"] = top_transaction["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-top_transaction["States"] = top_transaction["States"].str.replace("-", " ")
-top_transaction["States"] = top_transaction["States"].str.title()
-top_transaction['States'] = top_transaction['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
-
-# Top User
-path6 = os.path.join(base_path, "top/user/country/india/state/")
-top_user_list = os.listdir(path6)
-columns6 = {"States": [], "Years": [], "Quarter": [], "Pincodes": [], "RegisteredUser": []}
-
-for state in top_user_list:
-    cur_states = os.path.join(path6, state, "")
-    top_year_list = os.listdir(cur_states)
-
-    for year in top_year_list:
-        cur_years = os.path.join(cur_states, year, "")
-        top_file_list = os.listdir(cur_years)
-
-        for file in top_file_list:
-            cur_files = os.path.join(cur_years, file)
-            with open(cur_files, "r") as data:
-                I = json.load(data)
-
-            for i in I["data"]["pincodes"]:
-                name = i["name"]
-                registeredusers = i["registeredUsers"]
-                columns6["Pincodes"].append(name)
-                columns6["RegisteredUser"].append(registeredusers)
-                columns6["States"].append(state)
-                columns6["Years"].append(year)
-                columns6["Quarter"].append(int(file.strip(".json")))
-
-top_user = pd.DataFrame(columns6)
-top_user["States"] = top_user["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
-top_user["States"] = top_user["States"].str.replace("-", " ")
-top_user["States"] = top_user["States"].str.title()
-top_user['States'] = top_user['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu") 
-
-mydb = mysql.connector.connect(
-    host="localhost",        
-    user="root",            
-    password="root",      
-    database="businesscard",                 
-)
-
-cursor = mydb.cursor()
-print("✅ MySQL connection successful!")
-
-# Aggregated Insurance Table
-create_query7 = '''CREATE TABLE IF NOT EXISTS aggregated_insurance (
+
+# Row extractors: one parsed Pulse JSON file -> list of dicts (without States/Years/Quarter)
+def aggregated_insurance_rows(doc):
+    return [{"Insurance_type": i["name"], "Insurance_count": i["paymentInstruments"][0]["count"],
+             "Insurance_amount": i["paymentInstruments"][0]["amount"]} for i in doc["data"]["transactionData"]]
+
+
+def aggregated_transaction_rows(doc):
+    return [{"Transaction_type": i["name"], "Transaction_count": i["paymentInstruments"][0]["count"],
+             "Transaction_amount": i["paymentInstruments"][0]["amount"]} for i in doc["data"]["transactionData"]]
+
+
+def aggregated_user_rows(doc):
+    # usersByDevice is null for quarters Pulse has no device split for
+    return [{"Brands": i["brand"], "Transaction_count": i["count"], "Percentage": i["percentage"]}
+            for i in doc["data"]["usersByDevice"] or []]
+
+
+def map_insurance_rows(doc):
+    return [{"Districts": i["name"], "Transaction_count": i["metric"][0]["count"],
+             "Transaction_amount": i["metric"][0]["amount"]} for i in doc["data"]["hoverDataList"]]
+
+
+def map_transaction_rows(doc):
+    return [{"District": i["name"], "Transaction_count": i["metric"][0]["count"],
+             "Transaction_amount": i["metric"][0]["amount"]} for i in doc["data"]["hoverDataList"]]
+
+
+def map_user_rows(doc):
+    return [{"Districts": district, "RegisteredUser": values["registeredUsers"], "AppOpens": values["appOpens"]}
+            for district, values in doc["data"]["hoverData"].items()]
+
+
+def top_insurance_rows(doc):
+    return [{"Pincodes": i["entityName"], "Transaction_count": i["metric"]["count"],
+             "Transaction_amount": i["metric"]["amount"]} for i in doc["data"]["pincodes"]]
+
+
+def top_transaction_rows(doc):
+    return [{"Pincodes": i["entityName"], "Transaction_count": i["metric"]["count"],
+             "Transaction_amount": i["metric"]["amount"]} for i in doc["data"]["pincodes"]]
+
+
+def top_user_rows(doc):
+    return [{"Pincodes": i["name"], "RegisteredUser": i["registeredUsers"]} for i in doc["data"]["pincodes"]]
+
+
+#dataset/table -> (Pulse directory, row extractor, MySQL table definition)
+DATASETS = {
+    # Aggregated Insurance
+    "aggregated_insurance": ("aggregated/insurance/country/india/state/", aggregated_insurance_rows, '''(
     States varchar(50), Years int, Quarter int, Insurance_type varchar(50),
-    Insurance_count bigint, Insurance_amount bigint
-)'''
-cursor.execute(create_query7)
-mydb.commit()
-
-for _, row in aggre_insurance.iterrows():
-    insert_query7 = '''INSERT INTO aggregated_insurance (States, Years, Quarter, Insurance_type, Insurance_count, Insurance_amount)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row["States"], row["Years"], row["Quarter"], row["Insurance_type"], row["Insurance_count"], row["Insurance_amount"])
-    cursor.execute(insert_query7, values)
-    mydb.commit()
-
-# Aggregated Transaction Table
-create_query1 = '''CREATE TABLE IF NOT EXISTS aggregated_transaction (
+    Insurance_count bigint, Insurance_amount bigint,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Aggregated Transaction
+    "aggregated_transaction": ("aggregated/transaction/country/india/state/", aggregated_transaction_rows, '''(
     States varchar(50), Years int, Quarter int, Transaction_type varchar(50),
-    Transaction_count bigint, Transaction_amount bigint
-)'''
-cursor.execute(create_query1)
-mydb.commit()
-
-for _, row in aggre_transaction.iterrows():
-    insert_query1 = '''INSERT INTO aggregated_transaction (States, Years, Quarter, Transaction_type, Transaction_count, Transaction_amount)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row["States"], row["Years"], row["Quarter"], row["Transaction_type"], row["Transaction_count"], row["Transaction_amount"])
-    cursor.execute(insert_query1, values)
-    mydb.commit()
-
-# Aggregated User Table
-create_query2 = '''CREATE TABLE IF NOT EXISTS aggregated_user (
+    Transaction_count bigint, Transaction_amount bigint,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Aggregated User
+    "aggregated_user": ("aggregated/user/country/india/state/", aggregated_user_rows, '''(
     States varchar(50), Years int, Quarter int, Brands varchar(50),
-    Transaction_count bigint, Percentage float
-)'''
-cursor.execute(create_query2)
-mydb.commit()
-
-for _, row in aggre_user.iterrows():
-    insert_query2 = '''INSERT INTO aggregated_user (States, Years, Quarter, Brands, Transaction_count, Percentage)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row["States"], row["Years"], row["Quarter"], row["Brands"], row["Transaction_count"], row["Percentage"])
-    cursor.execute(insert_query2, values)
-    mydb.commit()
-
-# Map Insurance Table
-create_query8 = '''CREATE TABLE IF NOT EXISTS map_insurance (
+    Transaction_count bigint, Percentage float,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Map Insurance
+    "map_insurance": ("map/insurance/hover/country/india/state/", map_insurance_rows, '''(
     States varchar(50), Years int, Quarter int, District varchar(50),
-    Transaction_count bigint, Transaction_amount float
-)'''
-cursor.execute(create_query8)
-mydb.commit()
-
-for _, row in map_insurance.iterrows():
-    insert_query8 = '''INSERT INTO map_insurance (States, Years, Quarter, District, Transaction_count, Transaction_amount)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row['States'], row['Years'], row['Quarter'], row['Districts'], row['Transaction_count'], row['Transaction_amount'])
-    cursor.execute(insert_query8, values)
-    mydb.commit()
-
-# Map Transaction Table
-create_query3 = '''CREATE TABLE IF NOT EXISTS map_transaction (
+    Transaction_count bigint, Transaction_amount float,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Map Transaction
+    "map_transaction": ("map/transaction/hover/country/india/state/", map_transaction_rows, '''(
     States varchar(50), Years int, Quarter int, District varchar(50),
-    Transaction_count bigint, Transaction_amount float
-)'''
-cursor.execute(create_query3)
-mydb.commit()
-
-for _, row in map_transaction.iterrows():
-    insert_query3 = '''INSERT INTO map_transaction (States, Years, Quarter, District, Transaction_count, Transaction_amount)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row['States'], row['Years'], row['Quarter'], row['District'], row['Transaction_count'], row['Transaction_amount'])
-    cursor.execute(insert_query3, values)
-    mydb.commit()
-
-# Map User Table
-create_query4 = '''CREATE TABLE IF NOT EXISTS map_user (
+    Transaction_count bigint, Transaction_amount float,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Map User
+    "map_user": ("map/user/hover/country/india/state/", map_user_rows, '''(
     States varchar(50), Years int, Quarter int, Districts varchar(50),
-    RegisteredUser bigint, AppOpens bigint
-)'''
-cursor.execute(create_query4)
-mydb.commit()
-
-for _, row in map_user.iterrows():
-    insert_query4 = '''INSERT INTO map_user (States, Years, Quarter, Districts, RegisteredUser, AppOpens)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row["States"], row["Years"], row["Quarter"], row["Districts"], row["RegisteredUser"], row["AppOpens"])
-    cursor.execute(insert_query4, values)
-    mydb.commit()
-
-# Top Insurance Table
-create_query9 = '''CREATE TABLE IF NOT EXISTS top_insurance (
+    RegisteredUser bigint, AppOpens bigint,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Top Insurance
+    "top_insurance": ("top/insurance/country/india/state/", top_insurance_rows, '''(
     States varchar(50), Years int, Quarter int, Pincodes int,
-    Transaction_count bigint, Transaction_amount bigint
-)'''
-cursor.execute(create_query9)
-mydb.commit()
-
-for _, row in top_insur.iterrows():
-    insert_query9 = '''INSERT INTO top_insurance (States, Years, Quarter, Pincodes, Transaction_count, Transaction_amount)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row["States"], row["Years"], row["Quarter"], row["Pincodes"], row["Transaction_count"], row["Transaction_amount"])
-    cursor.execute(insert_query9, values)
-    mydb.commit()
-
-# Top Transaction Table
-create_query5 = '''CREATE TABLE IF NOT EXISTS top_transaction (
+    Transaction_count bigint, Transaction_amount bigint,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Top Transaction
+    "top_transaction": ("top/transaction/country/india/state/", top_transaction_rows, '''(
     States varchar(50), Years int, Quarter int, Pincodes int,
-    Transaction_count bigint, Transaction_amount bigint
-)'''
-cursor.execute(create_query5)
-mydb.commit()
-
-for _, row in top_transaction.iterrows():
-    insert_query5 = '''INSERT INTO top_transaction (States, Years, Quarter, Pincodes, Transaction_count, Transaction_amount)
-                      VALUES (%s, %s, %s, %s, %s, %s)'''
-    values = (row["States"], row["Years"], row["Quarter"], row["Pincodes"], row["Transaction_count"], row["Transaction_amount"])
-    cursor.execute(insert_query5, values)
-    mydb.commit()
-
-# Top User Table
-create_query6 = '''CREATE TABLE IF NOT EXISTS top_user (
+    Transaction_count bigint, Transaction_amount bigint,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+    # Top User
+    "top_user": ("top/user/country/india/state/", top_user_rows, '''(
     States varchar(50), Years int, Quarter int, Pincodes int,
-    RegisteredUser bigint
+    RegisteredUser bigint,
+    INDEX idx_period_state (Years, Quarter, States)
+)'''),
+}
+
+#map_insurance frames use "Districts" but the table column is "District"
+TABLE_COLUMN_RENAMES = {"map_insurance": {"Districts": "District"}}
+
+#Rows and files rejected by parse_shard/validate_frame, loaded next to the data tables for inspection
+QUARANTINE_TABLE = '''(
+    Dataset varchar(50), States varchar(50), File varchar(100), Reason varchar(255), Raw text
 )'''
-cursor.execute(create_query6)
-mydb.commit()
-
-for _, row in top_user.iterrows():
-    insert_query6 = '''INSERT INTO top_user (States, Years, Quarter, Pincodes, RegisteredUser)
-                      VALUES (%s, %s, %s, %s, %s)'''
-    values = (row["States"], row["Years"], row["Quarter"], row["Pincodes"], row["RegisteredUser"])
-    cursor.execute(insert_query6, values)
-    mydb.commit() 
+
+
+def clean_states(df):
+    df["States"] = df["States"].str.replace("andaman-&-nicobar-islands", "Andaman & Nicobar")
+    df["States"] = df["States"].str.replace("-", " ")
+    df["States"] = df["States"].str.title()
+    df['States'] = df['States'].str.replace("Dadra & Nagar Haveli & Daman & Diu", "Dadra and Nagar Haveli and Daman and Diu")
+    return df
+
+
+def parse_shard(data_dir, dataset, state):
+    # Every year/quarter file of one state of one dataset. Returns (rows, quarantined files); a file that is not
+    # valid JSON or lacks the expected fields is quarantined as a whole, the rest of the shard still loads.
+    path, extract_rows, _ = DATASETS[dataset]
+    cur_states = os.path.join(data_dir, path, state, "")
+    rows, bad_files = [], []
+    for year in sorted(os.listdir(cur_states)):
+        cur_years = os.path.join(cur_states, year, "")
+        for file in sorted(os.listdir(cur_years)):
+            source = f"{year}/{file}"
+            try:
+                with open(os.path.join(cur_years, file), "r") as data:
+                    doc = json.load(data)
+                quarter = file[:-len(".json")] if file.endswith(".json") else file
+                file_rows = [dict({"States": state, "Years": year, "Quarter": quarter}, **row) for row in extract_rows(doc)]
+            except MALFORMED_FILE_ERRORS as e:
+                bad_files.append({"File": source, "Reason": f"malformed file: {type(e).__name__}: {e}", "Raw": ""})
+                continue
+            for row in file_rows:
+                row["File"] = source
+            rows.extend(file_rows)
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df = clean_states(df)
+    return df, pd.DataFrame(bad_files, columns=["File", "Reason", "Raw"])
+
+
+def validate_frame(df):
+    # Vectorized checks over one shard: dtype coercion, nulls, ranges and duplicate (state, year, quarter, key).
+    # Columns are States, Years, Quarter, <key>, <measures...>, File. Returns (valid rows with clean dtypes,
+    # rejected raw rows as File/Reason/Raw), recording only the first failing check per row.
+    columns = [column for column in df.columns if column != "File"]
+    key_columns, measures = columns[:4], columns[4:]
+    typed = df.copy()
+    numeric = ["Years", "Quarter"] + measures + (["Pincodes"] if "Pincodes" in key_columns else [])
+    for column in numeric:
+        typed[column] = pd.to_numeric(typed[column], errors="coerce")
+
+    checks = [(typed[column].isna(), f"missing or non-numeric {column}" if column in numeric else f"missing {column}")
+              for column in key_columns]
+    checks += [
+        (~typed["Years"].between(FIRST_YEAR, time.gmtime().tm_year), "Years out of range"),
+        (~typed["Quarter"].isin([1, 2, 3, 4]), "Quarter out of range")
+    ]
+    for column in measures:
+        checks.append((typed[column].isna(), f"missing or non-numeric {column}"))
+        checks.append((typed[column] < 0, f"negative {column}"))
+        if column in MEASURE_UPPER_BOUNDS:
+            checks.append((typed[column] > MEASURE_UPPER_BOUNDS[column], f"{column} above {MEASURE_UPPER_BOUNDS[column]}"))
+
+    reason = pd.Series(None, index=df.index, dtype=object)
+    for mask, text in checks:
+        reason = reason.mask(reason.isna() & mask, text)
+    #Duplicates only among otherwise valid rows, the first occurrence is kept
+    duplicated = reason.isna() & typed[key_columns].where(reason.isna()).duplicated(keep="first")
+    reason = reason.mask(duplicated, "duplicate key")
+
+    bad = reason.notna()
+    rejected = pd.DataFrame({
+        "File": df.loc[bad, "File"],
+        "Reason": reason[bad],
+        "Raw": df.loc[bad, columns].to_json(orient="records", lines=True).splitlines() if bad.any() else []
+    })
+    valid = typed.loc[~bad, columns]
+    valid = valid.astype({"Years": "int64", "Quarter": "int64"})
+    if "Pincodes" in key_columns:
+        valid["Pincodes"] = valid["Pincodes"].astype("int64")
+    return valid.reset_index(drop=True), rejected.reset_index(drop=True)
+
+
+#Work queue
+def connect_queue(work_dir):
+    os.makedirs(work_dir, exist_ok=True)
+    queue = sqlite3.connect(os.path.join(work_dir, "queue.db"), timeout=60, isolation_level=None)
+    queue.execute('''CREATE TABLE IF NOT EXISTS shards (
+        dataset TEXT, state TEXT, status TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0,
+        worker TEXT, claimed_at REAL, finished_at REAL, error TEXT, output TEXT,
+        PRIMARY KEY (dataset, state)
+    )''')
+    return queue
+
+
+def init_queue(work_dir, data_dir, datasets=None, reset=False, resume=False):
+    # reset: start a new run, dropping every shard row and shard output of the previous one.
+    # resume: keep the existing rows and only add missing shards. Without either, a queue whose shards are all
+    # done is refused, since re-queueing it would process nothing and merge the previous run's outputs.
+    queue = connect_queue(work_dir)
+    if reset:
+        queue.execute("DELETE FROM shards")
+        shutil.rmtree(os.path.join(work_dir, "shards"), ignore_errors=True)
+    elif not resume:
+        total, done = queue.execute("SELECT COUNT(*), COALESCE(SUM(status = 'done'), 0) FROM shards").fetchone()
+        if total and total == done:
+            queue.close()
+            raise RuntimeError(f"the queue in {work_dir} already finished a run; pass --reset to start a new run "
+                               "from the current data or --resume to keep it")
+    count = 0
+    for dataset in datasets or DATASETS:
+        for state in sorted(os.listdir(os.path.join(data_dir, DATASETS[dataset][0]))):
+            count += queue.execute("INSERT OR IGNORE INTO shards (dataset, state) VALUES (?, ?)", (dataset, state)).rowcount
+    queue.close()
+    return count
+
+
+def claim_shard(queue, worker, max_attempts=MAX_ATTEMPTS, lease_seconds=LEASE_SECONDS):
+    # Pending shards, or running ones whose worker has not finished within the lease (crashed/killed host)
+    now = time.time()
+    queue.execute("BEGIN IMMEDIATE")
+    try:
+        queue.execute(
+            "UPDATE shards SET status = 'failed', error = 'lease expired' WHERE status = 'running' AND claimed_at < ? AND attempts >= ?",
+            (now - lease_seconds, max_attempts)
+        )
+        row = queue.execute(
+            '''SELECT dataset, state FROM shards
+               WHERE attempts < ? AND (status = 'pending' OR (status = 'running' AND claimed_at < ?))
+               ORDER BY attempts, dataset, state LIMIT 1''',
+            (max_attempts, now - lease_seconds)
+        ).fetchone()
+        if row:
+            queue.execute(
+                "UPDATE shards SET status = 'running', attempts = attempts + 1, worker = ?, claimed_at = ? WHERE dataset = ? AND state = ?",
+                (worker, now, row[0], row[1])
+            )
+        queue.execute("COMMIT")
+    except Exception:
+        queue.execute("ROLLBACK")
+        raise
+    return row
+
+
+def finish_shard(queue, dataset, state, output=None, error=None, max_attempts=MAX_ATTEMPTS):
+    if error is None:
+        queue.execute(
+            "UPDATE shards SET status = 'done', finished_at = ?, output = ?, error = NULL WHERE dataset = ? AND state = ?",
+            (time.time(), output, dataset, state)
+        )
+    else:
+        queue.execute(
+            "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, error = ? WHERE dataset = ? AND state = ?",
+            (max_attempts, error, dataset, state)
+        )
+
+
+def shard_output_path(work_dir, dataset, state, suffix=".csv"):
+    # <state>.csv rows, <state>.quarantine.csv rejected rows/files, <state>.quality.json counts and timings
+    return os.path.join(work_dir, "shards", dataset, f"{state}{suffix}")
+
+
+def write_replace(path, write):
+    # Write then rename, so a half-written file is never picked up by merge
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + f".{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def process_shard(work_dir, data_dir, dataset, state):
+    # Parse + validate one shard and write its outputs; returns the shard CSV path (None if no valid rows)
+    start = time.perf_counter()
+    df, rejected = parse_shard(data_dir, dataset, state)
+    parsed = time.perf_counter()
+    quality = {"rows": 0, "quarantined_rows": 0, "quarantined_files": len(rejected), "reasons": {}}
+    if not df.empty:
+        df, bad_rows = validate_frame(df)
+        quality["rows"], quality["quarantined_rows"] = len(df), len(bad_rows)
+        rejected = pd.concat([rejected, bad_rows], ignore_index=True) if len(bad_rows) else rejected
+    quality["reasons"] = {reason.split(":")[0]: int(count) for reason, count in rejected["Reason"].value_counts().items()}
+    quality["parse_s"], quality["validate_s"] = parsed - start, time.perf_counter() - parsed
+
+    output = None
+    if not df.empty:
+        output = shard_output_path(work_dir, dataset, state)
+        write_replace(output, lambda path: df.to_csv(path, index=False))
+    #Always rewritten so a retried shard never keeps the quarantine of an earlier attempt
+    quarantine = shard_output_path(work_dir, dataset, state, ".quarantine.csv")
+    write_replace(quarantine, lambda path: rejected.to_csv(path, index=False))
+    def write_quality(path):
+        with open(path, "w") as f:
+            json.dump(quality, f)
+    write_replace(shard_output_path(work_dir, dataset, state, ".quality.json"), write_quality)
+    return output
+
+
+def run_worker(work_dir, data_dir, worker=None, poll_seconds=5):
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    queue = connect_queue(work_dir)
+    processed = 0
+    while True:
+        shard = claim_shard(queue, worker)
+        if shard is None:
+            # Others may still fail and put shards back; leave only when nothing is running anywhere
+            running = queue.execute("SELECT COUNT(*) FROM shards WHERE status = 'running'").fetchone()[0]
+            if running == 0:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        dataset, state = shard
+        try:
+            output = process_shard(work_dir, data_dir, dataset, state)
+            finish_shard(queue, dataset, state, output=output)
+            processed += 1
+        except Exception as e:
+            finish_shard(queue, dataset, state, error=f"{type(e).__name__}: {e}")
+            print(f"❌ {dataset}/{state}: {e}", file=sys.stderr)
+    queue.close()
+    return processed
+
+
+def queue_status(work_dir):
+    queue = connect_queue(work_dir)
+    counts = dict(queue.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+    failed = queue.execute("SELECT dataset, state, attempts, error FROM shards WHERE status = 'failed' ORDER BY dataset, state").fetchall()
+    queue.close()
+    return counts, failed
+
+
+def merge_shards(work_dir, out_dir):
+    # Deterministic: shards concatenated in (dataset, state) order, rows stably sorted by their key columns
+    queue = connect_queue(work_dir)
+    not_done = queue.execute("SELECT dataset, state, status FROM shards WHERE status != 'done' ORDER BY dataset, state").fetchall()
+    shards = queue.execute("SELECT dataset, state, output FROM shards WHERE status = 'done' ORDER BY dataset, state").fetchall()
+    queue.close()
+    if not_done:
+        raise RuntimeError(f"{len(not_done)} shard(s) not done, e.g. {not_done[0]}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for dataset in sorted({shard[0] for shard in shards}):
+        frames = [pd.read_csv(output) for name, _, output in shards if name == dataset and output]
+        if not frames:
+            continue
+        df = pd.concat(frames, ignore_index=True)
+        key_columns = list(df.columns[:4])
+        df = df.sort_values(key_columns, kind="mergesort").reset_index(drop=True)
+        df.to_csv(os.path.join(out_dir, f"{dataset}.csv"), index=False)
+        written[dataset] = len(df)
+    merge_quality(work_dir, shards, out_dir)
+    return written
+
+
+def merge_quality(work_dir, shards, out_dir):
+    # quarantine.csv (every rejected row/file, with its dataset and state) and quality_summary.json for the run
+    frames, summary = [], {}
+    for dataset, state, _ in shards:
+        quality_path = shard_output_path(work_dir, dataset, state, ".quality.json")
+        if not os.path.exists(quality_path):
+            continue
+        with open(quality_path) as f:
+            quality = json.load(f)
+        totals = summary.setdefault(dataset, {"rows": 0, "quarantined_rows": 0, "quarantined_files": 0,
+                                              "reasons": {}, "parse_s": 0.0, "validate_s": 0.0})
+        for name in ["rows", "quarantined_rows", "quarantined_files", "parse_s", "validate_s"]:
+            totals[name] += quality[name]
+        for reason, count in quality["reasons"].items():
+            totals["reasons"][reason] = totals["reasons"].get(reason, 0) + count
+        if quality["quarantined_rows"] or quality["quarantined_files"]:
+            rejected = pd.read_csv(shard_output_path(work_dir, dataset, state, ".quarantine.csv"), dtype=str, keep_default_na=False)
+            rejected.insert(0, "States", state)
+            rejected.insert(0, "Dataset", dataset)
+            frames.append(rejected)
+
+    quarantine = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Dataset", "States", "File", "Reason", "Raw"])
+    quarantine.to_csv(os.path.join(out_dir, "quarantine.csv"), index=False)
+    with open(os.path.join(out_dir, "quality_summary.json"), "w") as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+    return summary
+
+
+def merge_output(args):
+    # Merge into --out, or into a staging directory published as a new snapshot under --snapshot-root
+    if not args.snapshot_root:
+        out_dir = args.out
+        written = merge_shards(args.work_dir, out_dir)
+    else:
+        staging = os.path.join(args.snapshot_root, f".staging-{os.getpid()}")
+        written = merge_shards(args.work_dir, staging)
+        snapshot_id = snapshot_phonepe.publish_snapshot(args.snapshot_root, staging, source=os.path.abspath(args.work_dir))
+        if not args.no_activate:
+            snapshot_phonepe.activate_snapshot(args.snapshot_root, snapshot_id)
+        out_dir = os.path.join(args.snapshot_root, snapshot_id)
+        print(f"snapshot {snapshot_id}" + ("" if args.no_activate else " (CURRENT)"))
+    with open(os.path.join(out_dir, "quality_summary.json")) as f:
+        quality = json.load(f)
+    for dataset, rows in written.items():
+        print(f"{dataset}: {rows:,} rows")
+    for dataset, totals in quality.items():
+        if totals["quarantined_rows"] or totals["quarantined_files"]:
+            reasons = ", ".join(f"{reason} x{count}" for reason, count in sorted(totals["reasons"].items()))
+            print(f"⚠️ {dataset}: quarantined {totals['quarantined_rows']:,} row(s), {totals['quarantined_files']} file(s) ({reasons})")
+    return out_dir
+
+
+def load_mysql(csv_dir, datasets=None):
+    import mysql.connector
+
+    mydb = mysql.connector.connect(
+        host="localhost",
+        user="root",
+        password="root",
+        database="businesscard",
+    )
+    cursor = mydb.cursor()
+    print("✅ MySQL connection successful!")
+
+    tables = [(dataset, DATASETS[dataset][2]) for dataset in datasets or DATASETS] + [("quarantine", QUARANTINE_TABLE)]
+    for dataset, table_definition in tables:
+        path = os.path.join(csv_dir, f"{dataset}.csv")
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path).rename(columns=TABLE_COLUMN_RENAMES.get(dataset, {}))
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {dataset} {table_definition}")
+        columns = ", ".join(df.columns)
+        placeholders = ", ".join(["%s"] * len(df.columns))
+        values = [tuple(None if pd.isna(v) else v for v in row) for row in df.itertuples(index=False)]
+        cursor.executemany(f"INSERT INTO {dataset} ({columns}) VALUES ({placeholders})", values)
+        mydb.commit()
+        print(f"{dataset}: {len(values):,} rows")
+    mydb.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded PhonePe Pulse ETL")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ["init", "worker", "run"]:
+        command = sub.add_parser(name)
+        command.add_argument("--data-dir", default=base_path, help="pulse-master/data directory")
+        command.add_argument("--work-dir", required=True, help="shared directory holding queue.db and shard outputs")
+        command.add_argument("--datasets", nargs="*", choices=list(DATASETS))
+    for command in [sub.choices["init"], sub.choices["run"]]:
+        command.add_argument("--resume", action="store_true",
+                             help="keep the shards of an earlier (interrupted) run instead of starting over")
+    sub.choices["init"].add_argument("--reset", action="store_true",
+                                     help="start a new run: drop the previous run's shards and outputs")
+    sub.choices["worker"].add_argument("--worker-id")
+    sub.choices["run"].add_argument("--workers", type=int, default=os.cpu_count())
+    sub.choices["run"].add_argument("--load", action="store_true", help="also load the merged tables into MySQL")
+
+    status = sub.add_parser("status")
+    status.add_argument("--work-dir", required=True)
+    merge = sub.add_parser("merge")
+    merge.add_argument("--work-dir", required=True)
+    for command in [sub.choices["run"], merge]:
+        output = command.add_mutually_exclusive_group(required=True)
+        output.add_argument("--out", help="plain directory of <table>.csv files")
+        output.add_argument("--snapshot-root", help="publish the merged tables as a new immutable snapshot")
+        command.add_argument("--no-activate", action="store_true", help="publish without pointing CURRENT at it")
+    load = sub.add_parser("load")
+    load.add_argument("--csv-dir", required=True)
+
+    snapshots = sub.add_parser("snapshots", help="list snapshots, newest first")
+    snapshots.add_argument("--snapshot-root", required=True)
+    activate = sub.add_parser("activate", help="point CURRENT at a snapshot (rollback / roll forward)")
+    activate.add_argument("--snapshot-root", required=True)
+    activate.add_argument("snapshot")
+    gc = sub.add_parser("gc", help="delete old snapshots")
+    gc.add_argument("--snapshot-root", required=True)
+    gc.add_argument("--keep", type=int, default=3, help="newest snapshots to keep besides CURRENT")
+    gc.add_argument("--protect", nargs="*", default=[], help="snapshot ids to keep regardless of age")
+    args = parser.parse_args()
+
+    if args.command == "init":
+        if args.reset and args.resume:
+            parser.error("--reset and --resume are mutually exclusive")
+        try:
+            queued = init_queue(args.work_dir, args.data_dir, args.datasets, reset=args.reset, resume=args.resume)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print(f"{queued} shard(s) queued")
+    elif args.command == "worker":
+        print(f"{run_worker(args.work_dir, args.data_dir, args.worker_id)} shard(s) processed")
+    elif args.command == "status":
+        counts, failed = queue_status(args.work_dir)
+        print(counts)
+        for dataset, state, attempts, error in failed:
+            print(f"failed {dataset}/{state} after {attempts} attempt(s): {error}")
+    elif args.command == "merge":
+        merge_output(args)
+    elif args.command == "load":
+        load_mysql(args.csv_dir)
+    elif args.command == "snapshots":
+        current = snapshot_phonepe.current_snapshot(args.snapshot_root)
+        for snapshot_id in snapshot_phonepe.list_snapshots(args.snapshot_root):
+            print(("* " if snapshot_id == current else "  ") + snapshot_id)
+    elif args.command == "activate":
+        snapshot_phonepe.activate_snapshot(args.snapshot_root, args.snapshot)
+        print(f"CURRENT -> {args.snapshot}")
+    elif args.command == "gc":
+        for snapshot_id in snapshot_phonepe.gc_snapshots(args.snapshot_root, args.keep, args.protect):
+            print(f"removed {snapshot_id}")
+    elif args.command == "run":
+        #Each run starts from the current data unless it continues an interrupted one
+        init_queue(args.work_dir, args.data_dir, args.datasets, reset=not args.resume, resume=args.resume)
+        workers = [Process(target=run_worker, args=(args.work_dir, args.data_dir)) for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        counts, failed = queue_status(args.work_dir)
+        if failed:
+            for dataset, state, attempts, error in failed:
+                print(f"failed {dataset}/{state} after {attempts} attempt(s): {error}", file=sys.stderr)
+            sys.exit(1)
+        out_dir = merge_output(args)
+        if args.load:
+            load_mysql(out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import data_phonepe
+import snapshot_phonepe
+import views_phonepe
+
+# Static mirror of the Explore view: every (category, year, quarter, region) the sidebar allows, rendered from
+# the same views_phonepe.build_view() the dashboard uses, as <view>.json + <view>.html under --out.
+#   python prerender_phonepe.py --csv-dir csv/ --out static/ --workers 8
+#   python prerender_phonepe.py --snapshot-root snapshots/ --out static/      # the CURRENT snapshot
+#
+# Layout: static/<Category>/<year>Q<quarter>/<region>.{json,html}, static/geometry/*.geojson (written once and
+# fetched by every page), static/plotly.min.js and static/manifest.json. Re-runs only rewrite views whose content
+# hash changed.
+
+MANIFEST = "manifest.json"
+#Bump when the page template or payload layout changes, so every view is re-rendered once
+RENDER_VERSION = "3"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>PhonePe Pulse - __TITLE__</title>
+  <script src="../../plotly.min.js"></script>
+  <style>
+    body { margin: 0 auto; max-width: 1200px; padding: 16px; background-color: #1a0d3d; color: white; font-family: sans-serif; }
+    .row { display: flex; gap: 24px; }
+    .row > div { flex: 1; }
+    h3.label { color: #e6e6e6; font-weight: normal; }
+  </style>
+</head>
+<body>
+  <h1>__CATEGORY__</h1>
+  <div id="map"></div>
+  <div class="row" id="metrics"></div>
+  <div id="categories"></div>
+  <div class="row" id="top10"></div>
+  <script id="view" type="application/json">__PAYLOAD__</script>
+  <script>
+    const view = JSON.parse(document.getElementById("view").textContent);
+
+    function add(parent, tag, text) {
+      const element = document.createElement(tag);
+      element.textContent = text;
+      parent.appendChild(element);
+      return element;
+    }
+
+    fetch("__GEOMETRY__").then(function (response) { return response.json(); }).then(function (geojson) {
+      Plotly.newPlot("map", [{
+        type: "choropleth", geojson: geojson, featureidkey: view.map.featureidkey,
+        locations: view.map.locations, z: view.map.z, text: view.map.text,
+        hovertemplate: "%{text}<extra></extra>", colorscale: __COLORSCALE__,
+        colorbar: { tickformat: "~s" }, marker: { line: { color: "#1a0d3d", width: 0.5 } }
+      }], {
+        title: { text: view.map.title }, height: 600, paper_bgcolor: "#1a0d3d", plot_bgcolor: "#1a0d3d",
+        font: { color: "white" }, margin: { l: 0, r: 0, t: 50, b: 0 },
+        geo: { visible: false, fitbounds: "locations", bgcolor: "#1a0d3d" }
+      }, { responsive: true, displaylogo: false });
+    });
+
+    const metrics = document.getElementById("metrics");
+    view.metrics.forEach(function (metric) {
+      const column = add(metrics, "div", "");
+      add(column, "h3", metric[0]).className = "label";
+      add(column, metric[2], metric[1]);
+    });
+    if (view.category === "Transactions") {
+      const categories = document.getElementById("categories");
+      add(categories, "h3", "Categories");
+      (view.categories || ["No transaction data available for this selection."]).forEach(function (line) {
+        add(categories, "p", line);
+      });
+    }
+    const top10 = document.getElementById("top10");
+    Object.keys(view.top10).forEach(function (title) {
+      const column = add(top10, "div", "");
+      add(column, "h3", "Top 10 " + title);
+      view.top10[title].forEach(function (line) { add(column, "p", line); });
+    });
+  </script>
+</body>
+</html>
+"""
+
+
+def slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def geometry_file(geometry_key):
+    # "states" -> states.geojson, "districts:Tamil Nadu" -> districts-tamil-nadu.geojson
+    return slug(geometry_key.replace(":", " ")) + ".geojson"
+
+
+def view_id(category, year, quarter, region):
+    return f"{category}/{year}Q{quarter}/{slug(region)}"
+
+
+def write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def render_page(payload):
+    # Text goes into HTML escaped, JSON inside <script> must not contain "</"; page-relative path from
+    # <Category>/<period>/ to geometry/
+    return (
+        PAGE_TEMPLATE
+        .replace("__TITLE__", html.escape(payload["map"]["title"]))
+        .replace("__CATEGORY__", html.escape(payload["category"]))
+        .replace("__GEOMETRY__", "../../geometry/" + geometry_file(payload["map"]["geometry_key"]))
+        .replace("__COLORSCALE__", json.dumps(views_phonepe.REDS_COLORSCALE))
+        .replace("__PAYLOAD__", json.dumps(payload).replace("</", "<\\/"))
+    )
+
+
+def render_quarter(csv_dir, year, quarter, states, district_index, previous, out_dir):
+    # One pool task: load and aggregate one quarter, then every category x region view of it.
+    # Returns ({view id: hash}, rendered count).
+    data = data_phonepe.load_quarter_data(year, quarter, csv_dir=csv_dir)
+    pre_agg_data = data_phonepe.pre_aggregate_data(
+        data, states=states, district_index=district_index, years=[year], quarters=[quarter]
+    )
+    hashes, rendered = {}, 0
+    for category in views_phonepe.CATEGORIES:
+        for region in ["All India"] + states:
+            vid = view_id(category, year, quarter, region)
+            payload = views_phonepe.view_payload(views_phonepe.build_view(pre_agg_data, category, year, quarter, region))
+            body = json.dumps(payload, sort_keys=True)
+            digest = hashlib.sha1((RENDER_VERSION + body).encode()).hexdigest()
+            hashes[vid] = digest
+            path = os.path.join(out_dir, vid)
+            if previous.get(vid) == digest and os.path.exists(path + ".html"):
+                continue
+            write_atomic(path + ".json", body)
+            write_atomic(path + ".html", render_page(payload))
+            rendered += 1
+    return hashes, rendered
+
+
+def write_geometry(out_dir, state_geojson, district_geojson, states, district_index):
+    # Shared by all pages; only rewritten when the content differs
+    geometries = {"states": state_geojson}
+    for state, geojson in data_phonepe.pre_filter_district_geojson(district_geojson, states, district_index).items():
+        geometries[f"districts:{state}"] = geojson
+    for geometry_key, geojson in geometries.items():
+        path = os.path.join(out_dir, "geometry", geometry_file(geometry_key))
+        text = json.dumps(geojson)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                if f.read() == text:
+                    continue
+        write_atomic(path, text)
+
+
+def prerender(csv_dir, out_dir, geojson_dir=".", version=None, workers=None, force=False):
+    #Also refreshed when the views themselves are up to date, e.g. after a plotly upgrade
+    views_phonepe.install_plotly_js(out_dir)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    previous, written = {}, {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        written = manifest["views"]
+        same_render = manifest.get("render_version") == RENDER_VERSION
+        if not force and version is not None and manifest.get("version") == version and same_render:
+            return manifest, 0
+        previous = written if same_render and not force else {}
+
+    dimensions = data_phonepe.load_dimensions(csv_dir=csv_dir)
+    states = dimensions["states"]
+    with open(os.path.join(geojson_dir, "india_states.geojson")) as f:
+        state_geojson = json.load(f)
+    with open(os.path.join(geojson_dir, "india_district.geojson")) as f:
+        district_geojson = data_phonepe.index_district_features(json.load(f))
+    district_index = data_phonepe.build_district_index(district_geojson, dimensions["districts"])
+    write_geometry(out_dir, state_geojson, district_geojson, states, district_index)
+
+    #Only the quarters that have data; the sidebar's years x quarters grid can have holes
+    quarters = dimensions["periods"]
+    views, rendered = {}, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(render_quarter, csv_dir, year, quarter, states, district_index,
+                        {vid: digest for vid, digest in previous.items() if f"/{year}Q{quarter}/" in vid}, out_dir)
+            for year, quarter in quarters
+        ]
+        for future in futures:
+            hashes, count = future.result()
+            views.update(hashes)
+            rendered += count
+
+    #Views from the previous run that no longer exist (e.g. a quarter or state dropped from the data)
+    for vid in sorted(written.keys() - views.keys()):
+        for suffix in [".json", ".html"]:
+            path = os.path.join(out_dir, vid + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+        try:
+            os.removedirs(os.path.dirname(os.path.join(out_dir, vid)))
+        except OSError:
+            pass
+
+    manifest = {
+        "version": version,
+        "render_version": RENDER_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "views": dict(sorted(views.items()))
+    }
+    write_atomic(manifest_path, json.dumps(manifest, indent=2))
+    return manifest, rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render every dashboard view to static JSON/HTML")
+    parser.add_argument("--out", required=True, help="static output directory")
+    parser.add_argument("--csv-dir", default=os.environ.get("PHONEPE_CSV_DIR"),
+                        help="read tables from <table>.csv files instead of MySQL")
+    parser.add_argument("--snapshot-root", default=os.environ.get("PHONEPE_SNAPSHOT_ROOT"))
+    parser.add_argument("--snapshot", help="snapshot id to render (default: the CURRENT one)")
+    parser.add_argument("--geojson-dir", default=".", help="folder with india_states.geojson and india_district.geojson")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true", help="re-render every view")
+    args = parser.parse_args()
+
+    try:
+        csv_dir, version = snapshot_phonepe.resolve_source(args.csv_dir, args.snapshot_root, args.snapshot)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    for name in ["india_states.geojson", "india_district.geojson"]:
+        if not os.path.exists(os.path.join(args.geojson_dir, name)):
+            print(f"missing {name} in {args.geojson_dir}", file=sys.stderr)
+            sys.exit(1)
+
+    start = time.perf_counter()
+    manifest, rendered = prerender(csv_dir, args.out, args.geojson_dir, version, args.workers, args.force)
+    print(f"{rendered:,} of {len(manifest['views']):,} views rendered in {time.perf_counter() - start:.1f}s"
+          + (f" (data version {version})" if version else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# Versioned data snapshots, shared by the ETL (phonepe.py), the dashboard and the API. No pandas here so the
+# dashboard can resolve the active snapshot before its first paint.
+
+#Versioned snapshots: <root>/<snapshot id>/<table>.csv + manifest.json, immutable once published.
+#<root>/CURRENT names the active snapshot; any other id can still be read for A/B comparison or rollback.
+MANIFEST = "manifest.json"
+CURRENT = "CURRENT"
+
+
+def list_snapshots(root):
+    # Newest first; ids start with a UTC timestamp so they sort chronologically
+    if not root or not os.path.isdir(root):
+        return []
+    return sorted(
+        (name for name in os.listdir(root) if os.path.exists(os.path.join(root, name, MANIFEST))),
+        reverse=True
+    )
+
+
+def current_snapshot(root):
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_manifest(root, snapshot_id):
+    with open(os.path.join(root, snapshot_id, MANIFEST)) as f:
+        return json.load(f)
+
+
+def activate_snapshot(root, snapshot_id):
+    if snapshot_id not in list_snapshots(root):
+        raise ValueError(f"unknown snapshot: {snapshot_id}")
+    tmp = os.path.join(root, f".{CURRENT}.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(snapshot_id)
+    os.replace(tmp, os.path.join(root, CURRENT))
+
+
+def publish_snapshot(root, staging_dir, source=None):
+    # Turns a directory of <table>.csv files into an immutable snapshot and returns its id. The hash part of the
+    # id covers the CSVs only (tables and quarantine.csv), not quality_summary.json and its run timings, so the
+    # same data always gets the same hash.
+    tables = {}
+    combined = hashlib.sha1()
+    for name in sorted(os.listdir(staging_dir)):
+        if not name.endswith(".csv"):
+            continue
+        digest = hashlib.sha1()
+        with open(os.path.join(staging_dir, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        tables[name[:-4]] = digest.hexdigest()
+        combined.update(f"{name}:{digest.hexdigest()}".encode())
+
+    created = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    snapshot_id = f"{created}-{combined.hexdigest()[:8]}"
+    with open(os.path.join(staging_dir, MANIFEST), "w") as f:
+        json.dump({"id": snapshot_id, "created_at": created, "source": source, "tables": tables}, f, indent=2)
+    for name in os.listdir(staging_dir):
+        os.chmod(os.path.join(staging_dir, name), 0o444)
+    os.makedirs(root, exist_ok=True)
+    target = os.path.join(root, snapshot_id)
+    if os.path.exists(target):
+        # Same second and same content hash: that snapshot already holds this data
+        shutil.rmtree(staging_dir)
+        return snapshot_id
+    os.rename(staging_dir, target)
+    return snapshot_id
+
+
+def gc_snapshots(root, keep=3, protect=()):
+    # Removes all but the `keep` newest snapshots; CURRENT and `protect` ids are never removed
+    keep_ids = set(list_snapshots(root)[:keep]) | set(protect)
+    current = current_snapshot(root)
+    if current:
+        keep_ids.add(current)
+    removed = []
+    for snapshot_id in list_snapshots(root):
+        if snapshot_id in keep_ids:
+            continue
+        path = os.path.join(root, snapshot_id)
+        os.chmod(path, 0o755)
+        for name in os.listdir(path):
+            os.chmod(os.path.join(path, name), 0o644)
+        shutil.rmtree(path)
+        removed.append(snapshot_id)
+    return removed
+
+
+def resolve_source(csv_dir=None, snapshot_root=None, snapshot=None):
+    # (csv_dir, version) the dashboard/API should read. A snapshot root wins over a plain csv_dir; without
+    # either, MySQL is used and the version is None (callers fall back to data_version).
+    if snapshot_root:
+        snapshot = snapshot or current_snapshot(snapshot_root)
+        if snapshot is None:
+            raise FileNotFoundError(f"no CURRENT snapshot in {snapshot_root}")
+        return os.path.join(snapshot_root, snapshot), snapshot
+    if csv_dir and os.path.exists(os.path.join(csv_dir, MANIFEST)):
+        with open(os.path.join(csv_dir, MANIFEST)) as f:
+            return csv_dir, json.load(f)["id"]
+    return csv_dir, None
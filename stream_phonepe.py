@@ -1,13 +1,25 @@
-import streamlit as st
-import pandas as pd
-import mysql.connector
-from streamlit_option_menu import option_menu
-import plotly.express as px
-import requests
-from functools import lru_cache
+import time
+_T0 = time.perf_counter()
+
 import json
+import logging
 import os
 
+import streamlit as st
+
+import snapshot_phonepe
+
+# Heavy modules (pandas, plotly, requests, mysql.connector) are imported where they are first used,
+# so the header and sidebar paint before any of them load.
+
+#Budget in milliseconds from the start of a script run (every rerun) to the painted sidebar. Import cost of
+#streamlit itself is paid once per process, before this script runs, and is checked by bench_startup.py.
+SIDEBAR_BUDGET_MS = float(os.environ.get("PHONEPE_SIDEBAR_BUDGET_MS", 1000))
+CSV_DIR = os.environ.get("PHONEPE_CSV_DIR")
+SNAPSHOT_ROOT = os.environ.get("PHONEPE_SNAPSHOT_ROOT")
+
+logger = logging.getLogger("stream_phonepe")
+
 # Set Streamlit-configuration
 st.set_page_config(layout="wide", page_title="PhonePe Pulse Data Visualization")
 
@@ -61,47 +73,70 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@st.cache_data
-def load_all_data():
+#Every data loader takes the (csv_dir, snapshot id) source first, so cache entries are keyed on the data version
+#and two snapshots can be cached side by side; max_entries lets old versions age out.
+@st.cache_data(max_entries=4)
+def load_dimensions(source):
+    import data_phonepe
     try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="phonepe_new"
-        )
-        queries = {
-            "aggregated_transaction": "SELECT * FROM aggregated_transaction",
-            "map_transaction": "SELECT * FROM map_transaction",
-            "map_user": "SELECT * FROM map_user",
-            "top_transaction": "SELECT * FROM top_transaction",
-            "top_user": "SELECT * FROM top_user"
-        }
-        data = {}
-        for table, query in queries.items():
-            df = pd.read_sql(query, conn)
-            data[table] = df
-        conn.close()
-        return data
+        return data_phonepe.load_dimensions(csv_dir=source[0])
     except Exception as e:
         st.error(f"Error fetching data from database: {e}")
         st.stop()
 
+#Only the selected (year, quarter) slice is loaded and aggregated
+@st.cache_data(max_entries=64)
+def load_quarter_aggregates(source, year, quarter, states):
+    import data_phonepe
+    try:
+        data = data_phonepe.load_quarter_data(year, quarter, csv_dir=source[0])
+    except Exception as e:
+        st.error(f"Error fetching data from database: {e}")
+        st.stop()
+    return data_phonepe.pre_aggregate_data(
+        data, states=states, district_index=load_district_index(source), years=[year], quarters=[quarter]
+    )
+
+#Full history, only loaded when a view needs every quarter (comparison mode)
+@st.cache_data(max_entries=2)
+def load_all_data(source):
+    import data_phonepe
+    try:
+        return data_phonepe.load_all_data(csv_dir=source[0])
+    except Exception as e:
+        st.error(f"Error fetching data from database: {e}")
+        st.stop()
+
+@st.cache_data(max_entries=8)
+def load_region_timeseries(source, category, level):
+    import data_phonepe
+    return data_phonepe.build_region_timeseries(load_all_data(source), category, level)
+
+#Built on the first search only; every later keystroke is a bisect over the sorted keys
+@st.cache_data(max_entries=2)
+def load_search_index(source):
+    import data_phonepe
+    return data_phonepe.build_search_index(load_all_data(source))
+
+#Ad-hoc query results, keyed by the data version and the normalized query
+@st.cache_data(max_entries=128)
+def run_query(source, query):
+    import data_phonepe
+    return data_phonepe.run_query(query, csv_dir=source[0])
+
 #Cache GeoJSON data locally to avoid repeated network requests
-@st.cache_data
-def load_state_geojson():
-    local_file = "india_states.geojson"
-    url = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
+def fetch_geojson(local_file, url, label):
 #local file exists
     if os.path.exists(local_file):
         try:
             with open(local_file, "r") as f:
                 return json.load(f)
         except Exception as e:
-            st.warning(f"Failed to load local state GeoJSON: {e}. Attempting to fetch from URL.")
-    
+            st.warning(f"Failed to load local {label} GeoJSON: {e}. Attempting to fetch from URL.")
+
 #URL if local file doesn't exist or fails
     try:
+        import requests
         response = requests.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
@@ -110,191 +145,56 @@ def load_state_geojson():
             json.dump(data, f)
         return data
     except Exception as e:
-        st.error(f"Failed to load state GeoJSON: {e}. Please provide a local GeoJSON file.")
+        st.error(f"Failed to load {label} GeoJSON: {e}. Please provide a local GeoJSON file.")
         return None
 
 @st.cache_data
-def load_district_geojson():
-    local_file = "india_district.geojson"
-    url = "https://raw.githubusercontent.com/geohacker/india/master/district/india_district.geojson"
-    
-
-    if os.path.exists(local_file):
-        try:
-            with open(local_file, "r") as f:
-                return json.load(f)
-        except Exception as e:
-            st.warning(f"Failed to load local district GeoJSON: {e}. Attempting to fetch from URL.")
+def load_state_geojson():
+    return fetch_geojson(
+        "india_states.geojson",
+        "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson",
+        "state"
+    )
 
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-   
-        with open(local_file, "w") as f:
-            json.dump(data, f)
-        return data
-    except Exception as e:
-        st.error(f"Failed to load district GeoJSON: {e}. Please provide a local GeoJSON file.")
+@st.cache_data
+def load_district_geojson():
+    import data_phonepe
+    district_geojson = fetch_geojson(
+        "india_district.geojson",
+        "https://raw.githubusercontent.com/geohacker/india/master/district/india_district.geojson",
+        "district"
+    )
+    if district_geojson is None:
         return None
+    return data_phonepe.index_district_features(district_geojson)
 
-# Pre-aggregate-faster access
-@st.cache_data
-def pre_aggregate_data(data):
-    Aggre_transaction = data["aggregated_transaction"]
-    Map_transaction = data["map_transaction"]
-    Map_user = data["map_user"]
-    Top_transaction = data["top_transaction"]
-    Top_user = data["top_user"]
-
-#Statemapping_standardize names
-    state_mapping = {
-        "Andaman & Nicobar": "Andaman and Nicobar Islands",
-        "Dadra and Nagar Haveli and Daman and Diu": "Dadra and Nagar Haveli",
-        "Jammu & Kashmir": "Jammu and Kashmir",
-        "Delhi": "NCT of Delhi",
-        "India": "All India"
-    }
-#apply mapping
-    for df in [Aggre_transaction, Map_transaction, Map_user, Top_transaction, Top_user]:
-        df["States"] = df["States"].str.strip().str.title()
-        df["States"] = df["States"].replace(state_mapping)
-
-  
-    agg_transaction_dict = {}
-    map_transaction_state_dict = {}
-    map_transaction_district_dict = {}
-    top_transaction_dict = {}
-
-
-    map_user_state_dict = {}
-    map_user_district_dict = {}
-    top_user_dict = {}
-
-    years = sorted(Map_transaction["Years"].unique())
-    quarters = sorted(Map_transaction["Quarter"].unique())
-    states = sorted(Map_transaction["States"].unique())
-
-
-    agg_txn_grouped = Aggre_transaction.groupby(["Years", "Quarter", "States", "Transaction_type"])["Transaction_count"].sum().reset_index()
-    categories_by_year_quarter = {}
-    for year in years:
-        for quarter in quarters:
-            agg_txn_subset = agg_txn_grouped[(agg_txn_grouped["Years"] == year) & (agg_txn_grouped["Quarter"] == quarter) & (agg_txn_grouped["States"] == "All India")]
-            categories_by_year_quarter[(year, quarter)] = agg_txn_subset.groupby("Transaction_type")["Transaction_count"].sum().to_dict()
-
-
-    map_txn_grouped = Map_transaction.groupby(["Years", "Quarter", "States", "Districts"])[["Transaction_count", "Transaction_amount"]].sum().reset_index()
-    map_usr_grouped = Map_user.groupby(["Years", "Quarter", "States", "Districts"])[["RegisteredUser", "AppOpens"]].sum().reset_index()
-    top_txn_grouped = Top_transaction.groupby(["Years", "Quarter", "States", "Pincodes"])["Transaction_count"].sum().reset_index()
-    top_usr_grouped = Top_user.groupby(["Years", "Quarter", "States", "Pincodes"])["RegisteredUser"].sum().reset_index()
-
-    for year in years:
-        for quarter in quarters:
-            map_txn = map_txn_grouped[(map_txn_grouped["Years"] == year) & (map_txn_grouped["Quarter"] == quarter)]
-            map_usr = map_usr_grouped[(map_usr_grouped["Years"] == year) & (map_usr_grouped["Quarter"] == quarter)]
-            top_txn = top_txn_grouped[(top_txn_grouped["Years"] == year) & (top_txn_grouped["Quarter"] == quarter)]
-            top_usr = top_usr_grouped[(top_usr_grouped["Years"] == year) & (top_usr_grouped["Quarter"] == quarter)]
-
-          
-            categories_data = categories_by_year_quarter.get((year, quarter), {})
-
-            for state in states:
-                key = (year, quarter, state)
-                agg_transaction_dict[key] = categories_data
-
-                map_txn_state = map_txn[map_txn["States"] == state]
-                map_transaction_state_dict[key] = {
-                    "Transaction_count": map_txn_state["Transaction_count"].sum(),
-                    "Transaction_amount": map_txn_state["Transaction_amount"].sum()
-                }
-                map_transaction_district_dict[key] = map_txn_state[["Districts", "Transaction_count", "Transaction_amount"]]
-
-       
-                map_usr_state = map_usr[map_usr["States"] == state]
-                map_user_state_dict[key] = {
-                    "RegisteredUser": map_usr_state["RegisteredUser"].sum(),
-                    "AppOpens": map_usr_state["AppOpens"].sum()
-                }
-                map_user_district_dict[key] = map_usr_state[["Districts", "RegisteredUser", "AppOpens"]]
-
-             
-                top_txn_state = top_txn[top_txn["States"] == state]
-                top_transaction_dict[key] = top_txn_state[["Pincodes", "Transaction_count"]]
-
-            
-                top_usr_state = top_usr[top_usr["States"] == state]
-                top_user_dict[key] = top_usr_state[["Pincodes", "RegisteredUser"]]
-
-            key = (year, quarter, "All India")
-            agg_transaction_dict[key] = categories_data
-            map_transaction_state_dict[key] = map_txn.groupby("States")[["Transaction_count", "Transaction_amount"]].sum().reset_index()
-            map_transaction_district_dict[key] = map_txn[["Districts", "Transaction_count", "Transaction_amount"]]
-            map_user_state_dict[key] = map_usr.groupby("States")[["RegisteredUser", "AppOpens"]].sum().reset_index()
-            map_user_district_dict[key] = map_usr[["Districts", "RegisteredUser", "AppOpens"]]
-            top_transaction_dict[key] = top_txn[["Pincodes", "Transaction_count"]]
-            top_user_dict[key] = top_usr[["Pincodes", "RegisteredUser"]]
-
-    return {
-        "agg_transaction_dict": agg_transaction_dict,
-        "map_transaction_state_dict": map_transaction_state_dict,
-        "map_transaction_district_dict": map_transaction_district_dict,
-        "map_user_state_dict": map_user_state_dict,
-        "map_user_district_dict": map_user_district_dict,
-        "top_transaction_dict": top_transaction_dict,
-        "top_user_dict": top_user_dict,
-        "years": years,
-        "quarters": quarters,
-        "states": states
-    }
+#(state, district) -> GeoJSON feature id, resolved once per process instead of name matching on every rerun
+@st.cache_data(max_entries=2)
+def load_district_index(source):
+    import data_phonepe
+    district_geojson = load_district_geojson()
+    if district_geojson is None:
+        return None
+    return data_phonepe.build_district_index(district_geojson, load_dimensions(source)["districts"])
 
-#GeoJSON for each state
-@st.cache_data
-def pre_filter_district_geojson(district_geojson, states):
+#District GeoJSON of one state, filtered the first time that state is opened
+@st.cache_data(max_entries=64)
+def load_state_district_geojson(source, state):
+    import data_phonepe
+    district_geojson = load_district_geojson()
     if district_geojson is None:
         return None
-    filtered_geojson = {}
-    for state in states:
-        if state == "All India":
-            filtered_geojson[state] = district_geojson
-            continue
-        filtered_features = [
-            feature for feature in district_geojson["features"]
-            if feature["properties"]["NAME_1"] == state
-        ]
-        filtered_geojson[state] = {
-            "type": "FeatureCollection",
-            "features": filtered_features
-        }
-    return filtered_geojson
-
-
-all_data = load_all_data()
-pre_agg_data = pre_aggregate_data(all_data)
-
-
-agg_transaction_dict = pre_agg_data["agg_transaction_dict"]
-map_transaction_state_dict = pre_agg_data["map_transaction_state_dict"]
-map_transaction_district_dict = pre_agg_data["map_transaction_district_dict"]
-map_user_state_dict = pre_agg_data["map_user_state_dict"]
-map_user_district_dict = pre_agg_data["map_user_district_dict"]
-top_transaction_dict = pre_agg_data["top_transaction_dict"]
-top_user_dict = pre_agg_data["top_user_dict"]
-years = pre_agg_data["years"]
-quarters = pre_agg_data["quarters"]
-states = pre_agg_data["states"]
-states.insert(0, "All India")
-
-
-state_geojson = load_state_geojson()
-district_geojson = load_district_geojson()
-filtered_district_geojson = pre_filter_district_geojson(district_geojson, states)
-
-if state_geojson is None or filtered_district_geojson is None:
-    st.error("Cannot proceed without GeoJSON data. Please check the URLs or provide local GeoJSON files.")
-    st.stop()
+    return data_phonepe.pre_filter_district_geojson(district_geojson, [state], load_district_index(source))[state]
+
+#Report districts the join index could not place on the map instead of leaving them silently blank
+def unmatched_districts_warning(unmatched):
+    if unmatched:
+        with st.expander(f"{len(unmatched)} district(s) could not be matched to the map"):
+            st.write(", ".join(unmatched))
+
 
 with st.container():
+    from streamlit_option_menu import option_menu
     col1, col2, col3 = st.columns([1, 3, 1])
     with col1:
         st.image("https://www.phonepe.com/pulse/static/pulse-logo-white.png", width=150)
@@ -318,237 +218,243 @@ with st.container():
 
 with st.sidebar:
     st.header("Filters")
+    #?snapshot=<id> or the "Data version" box pins a snapshot; otherwise the one named by CURRENT
+    snapshot = st.query_params.get("snapshot")
+    if SNAPSHOT_ROOT:
+        snapshot_ids = snapshot_phonepe.list_snapshots(SNAPSHOT_ROOT)
+        current = snapshot_phonepe.current_snapshot(SNAPSHOT_ROOT)
+        #An unknown ?snapshot= id falls back to CURRENT, not to the newest snapshot
+        active = snapshot if snapshot in snapshot_ids else current
+        snapshot = st.selectbox(
+            "Data version", snapshot_ids, index=snapshot_ids.index(active) if active in snapshot_ids else 0,
+            format_func=lambda snapshot_id: snapshot_id + (" (current)" if snapshot_id == current else "")
+        )
+    try:
+        source = snapshot_phonepe.resolve_source(csv_dir=CSV_DIR, snapshot_root=SNAPSHOT_ROOT, snapshot=snapshot)
+    except FileNotFoundError as e:
+        st.error(f"No data snapshot available: {e}")
+        st.stop()
+    view = st.radio("View", ["Explore", "Compare"], horizontal=True)
     category = st.selectbox("Category", ["Transactions", "Users"])
-    selected_state = st.selectbox("Region", states)
-    selected_year = st.selectbox("Year", years)
-    selected_quarter = st.selectbox("Quarter", quarters)
+    with st.spinner("Loading filters..."):
+        dimensions = load_dimensions(source)
+    states = ["All India"] + dimensions["states"]
+    years = dimensions["years"]
+    quarters = dimensions["quarters"]
+    if view == "Explore":
+        selected_state = st.selectbox("Region", states)
+        selected_year = st.selectbox("Year", years)
+        selected_quarter = st.selectbox("Quarter", quarters)
+        search_query = st.text_input("Search district or pincode")
+
+rerun_to_sidebar_ms = (time.perf_counter() - _T0) * 1000
+st.session_state["startup_timings"] = {"rerun_to_sidebar_ms": rerun_to_sidebar_ms}
+if rerun_to_sidebar_ms > SIDEBAR_BUDGET_MS:
+    logger.warning("Sidebar over budget: %.0f ms from rerun start (budget %.0f)", rerun_to_sidebar_ms, SIDEBAR_BUDGET_MS)
+
+#Comparison mode: several regions over a quarter range, from one vectorized pass over the full history
+if view == "Compare":
+    import data_phonepe
+    import plotly.express as px
+
+    with st.sidebar:
+        level = st.radio("Compare", ["States", "Districts"], horizontal=True)
+        measure = st.selectbox("Measure", data_phonepe.COMPARE_MEASURES[category][1])
+    with st.spinner("Loading history..."):
+        timeseries = load_region_timeseries(source, category, level)
+    periods = sorted(timeseries["Period"].unique())
+    with st.sidebar:
+        regions = st.multiselect(level, sorted(timeseries["Region"].unique()), max_selections=20)
+        start, end = st.select_slider(
+            "Quarters", options=periods, value=(periods[0], periods[-1]), format_func=data_phonepe.period_label
+        )
 
+    st.header(f"Compare {level.lower()} - {category}")
+    comparison = data_phonepe.compare_regions(timeseries, regions, start, end, measure) if regions else None
+    if comparison is None:
+        st.info(f"Select one or more {level.lower()} in the sidebar to compare them.")
+        st.stop()
 
-st.header(category)
+    st.dataframe(comparison["summary"].style.format("{:,.2f}"), use_container_width=True)
+    for title, frame, label in [
+        (f"{measure} by quarter", comparison["values"], measure),
+        ("Quarter-on-quarter growth", comparison["growth"], "Growth %"),
+        ("Share of " + ("All India" if level == "States" else "state"), comparison["share"], "Share %")
+    ]:
+        chart = frame.rename(index=data_phonepe.period_label).reset_index().melt(
+            id_vars="Period", var_name="Region", value_name=label
+        )
+        fig = px.line(chart, x="Period", y=label, color="Region", markers=True, title=title, height=400)
+        fig.update_layout(
+            paper_bgcolor="#1a0d3d",
+            plot_bgcolor="#1a0d3d",
+            font=dict(color="white"),
+            margin=dict(l=0, r=0, t=50, b=0)
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    st.stop()
+
+#Search: jump straight to one district's or pincode's metrics and quarter history
+if search_query:
+    import data_phonepe
+    import pandas as pd
+    import plotly.express as px
+
+    with st.spinner("Building search index..."):
+        search_index = load_search_index(source)
+    matches = data_phonepe.search_entities(search_index, search_query)
+    if not matches:
+        st.info(f"No district or pincode starts with '{search_query}'.")
+    else:
+        entity = st.selectbox(
+            "Search results", matches, format_func=lambda match: f"{match[2]} ({match[0]}, {match[1]})"
+        )
+        history = data_phonepe.entity_history(search_index, entity)
+        current = history[(history["Years"] == selected_year) & (history["Quarter"] == selected_quarter)]
+        row = current.iloc[0] if len(current) else history.iloc[-1]
+        st.subheader(f"{entity[2]}, {entity[1]} - Q{row['Quarter']} {row['Years']}")
+        measures = [column for column in ["Transaction_count", "Transaction_amount", "RegisteredUser", "AppOpens"] if column in history]
+        for column, measure in zip(st.columns(len(measures)), measures):
+            with column:
+                #A district can appear in only one of the transaction / user tables for a quarter
+                st.metric(measure, "–" if pd.isna(row[measure]) else f"{row[measure]:,.0f}")
+        chart = history.assign(Period=history["Quarter"].map("Q{}".format) + " " + history["Years"].astype(str))
+        fig = px.line(chart, x="Period", y=measures[0], markers=True, title=f"{measures[0]} by quarter", height=350)
+        fig.update_layout(
+            paper_bgcolor="#1a0d3d",
+            plot_bgcolor="#1a0d3d",
+            font=dict(color="white"),
+            margin=dict(l=0, r=0, t=50, b=0)
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
+with st.spinner("Loading data..."):
+    import data_phonepe
+    import views_phonepe
+    pre_agg_data = load_quarter_aggregates(source, selected_year, selected_quarter, dimensions["states"])
+
+#Only the geometry the current view needs
 with st.spinner("Loading map..."):
-    if category == "Transactions":
-        key = (selected_year, selected_quarter, selected_state)
-        if selected_state == "All India":
-            df = map_transaction_state_dict[key]
-            
-            total_transactions = df["Transaction_count"].sum()
-            total_amount = df["Transaction_amount"].sum()
-            avg_transaction = total_amount / total_transactions if total_transactions > 0 else 0
-
-            fig_map = px.choropleth(
-                df,
-                geojson=state_geojson,
-                locations="States",
-                featureidkey="properties.ST_NM",
-                color="Transaction_count",
-                color_continuous_scale="Reds",
-                hover_name="States",
-                hover_data={"Transaction_count": ":,", "Transaction_amount": ":,"},
-                title=f"Transaction Count by State (Q{selected_quarter} {selected_year})",
-                height=600
-            )
-            fig_map.update_geos(visible=False, fitbounds="locations")
-            fig_map.update_layout(
-                paper_bgcolor="#1a0d3d",
-                plot_bgcolor="#1a0d3d",
-                font=dict(color="white"),
-                margin=dict(l=0, r=0, t=50, b=0)
-            )
-            st.plotly_chart(fig_map, use_container_width=True)
-        else:
-            df = map_transaction_district_dict[key]
-            
-            total_transactions = df["Transaction_count"].sum()
-            total_amount = df["Transaction_amount"].sum()
-            avg_transaction = total_amount / total_transactions if total_transactions > 0 else 0
-
-            df["Districts"] = df["Districts"].str.title()
-            fig_map = px.choropleth(
-                df,
-                geojson=filtered_district_geojson[selected_state],
-                locations="Districts",
-                featureidkey="properties.NAME_2",
-                color="Transaction_count",
-                color_continuous_scale="Reds",
-                hover_name="Districts",
-                hover_data={"Transaction_count": ":,", "Transaction_amount": ":,"},
-                title=f"Transaction Count in {selected_state} (Q{selected_quarter} {selected_year})",
-                height=600
-            )
-            fig_map.update_geos(visible=False, fitbounds="locations")
-            fig_map.update_layout(
-                paper_bgcolor="#1a0d3d",
-                plot_bgcolor="#1a0d3d",
-                font=dict(color="white"),
-                margin=dict(l=0, r=0, t=50, b=0)
-            )
-            st.plotly_chart(fig_map, use_container_width=True)
-
-        col1, col2, col3 = st.columns([2, 1, 1])
-        with col1:
-            st.subheader("All PhonePe transactions (UPI + Cards + Wallets)")
-            st.markdown(f"<h1 style='color: #e6e6e6;'>{total_transactions:,}</h1>", unsafe_allow_html=True)
-        with col2:
-            st.subheader("Total payment value")
-            st.markdown(f"<h3 style='color: #e6e6e6;'>₹{total_amount/10000000:,.0f} Cr</h3>", unsafe_allow_html=True)
-        with col3:
-            st.subheader("Avg. transaction value")
-            st.markdown(f"<h3 style='color: #e6e6e6;'>₹{avg_transaction:,.0f}</h3>", unsafe_allow_html=True)
-
-        
-        st.subheader("Categories")
-        categories_data = agg_transaction_dict[key]
-        
-        if not categories_data:
-            st.warning(f"No transaction data available for Year {selected_year}, Quarter {selected_quarter}, State {selected_state}.")
-        else:
-            categories_dict = {
-                "Merchant payments": 0,
-                "Peer-to-peer payments": 0,
-                "Recharge & bill payments": 0,
-                "Financial Services": 0,
-                "Others": 0
-            }
-            for transaction_type, count in categories_data.items():
-                transaction_type_lower = transaction_type.lower()
-                if "merchant" in transaction_type_lower:
-                    categories_dict["Merchant payments"] += count
-                elif "p2p" in transaction_type_lower or "peer-to-peer" in transaction_type_lower:
-                    categories_dict["Peer-to-peer payments"] += count
-                elif "recharge" in transaction_type_lower or "bill" in transaction_type_lower:
-                    categories_dict["Recharge & bill payments"] += count
-                elif "financial" in transaction_type_lower:
-                    categories_dict["Financial Services"] += count
-                else:
-                    categories_dict["Others"] += count
-
-            for key, value in categories_dict.items():
-                st.markdown(f"{key}: {value:,}")
-
-    else: 
-        key = (selected_year, selected_quarter, selected_state)
-        if selected_state == "All India":
-            df = map_user_state_dict[key]
-            
-            total_users = df["RegisteredUser"].sum()
-            total_app_opens = df["AppOpens"].sum()
-
-            fig_map = px.choropleth(
-                df,
-                geojson=state_geojson,
-                locations="States",
-                featureidkey="properties.ST_NM",
-                color="RegisteredUser",
-                color_continuous_scale="Reds",
-                hover_name="States",
-                hover_data={"RegisteredUser": ":,", "AppOpens": ":,"},
-                title=f"Registered Users by State (Q{selected_quarter} {selected_year})",
-                height=600
-            )
-            fig_map.update_geos(visible=False, fitbounds="locations")
-            fig_map.update_layout(
-                paper_bgcolor="#1a0d3d",
-                plot_bgcolor="#1a0d3d",
-                font=dict(color="white"),
-                margin=dict(l=0, r=0, t=50, b=0)
-            )
-            st.plotly_chart(fig_map, use_container_width=True)
-        else:
-            df = map_user_district_dict[key]
-            
-            total_users = df["RegisteredUser"].sum()
-            total_app_opens = df["AppOpens"].sum()
-
-            df["Districts"] = df["Districts"].str.title()
-            fig_map = px.choropleth(
-                df,
-                geojson=filtered_district_geojson[selected_state],
-                locations="Districts",
-                featureidkey="properties.NAME_2",
-                color="RegisteredUser",
-                color_continuous_scale="Reds",
-                hover_name="Districts",
-                hover_data={"RegisteredUser": ":,", "AppOpens": ":,"},
-                title=f"Registered Users in {selected_state} (Q{selected_quarter} {selected_year})",
-                height=600
-            )
-            fig_map.update_geos(visible=False, fitbounds="locations")
-            fig_map.update_layout(
-                paper_bgcolor="#1a0d3d",
-                plot_bgcolor="#1a0d3d",
-                font=dict(color="white"),
-                margin=dict(l=0, r=0, t=50, b=0)
-            )
-            st.plotly_chart(fig_map, use_container_width=True)
+    if selected_state == "All India":
+        map_geojson = load_state_geojson()
+    else:
+        map_geojson = load_state_district_geojson(source, selected_state)
 
-     
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            st.subheader(f"Registered PhonePe users till Q{selected_quarter} {selected_year}")
-            st.markdown(f"<h1 style='color: #e6e6e6;'>{total_users:,}</h1>", unsafe_allow_html=True)
-        with col2:
-            st.subheader(f"PhonePe app opens in Q{selected_quarter} {selected_year}")
-            st.markdown(f"<h1 style='color: #e6e6e6;'>{total_app_opens:,}</h1>", unsafe_allow_html=True)
+if map_geojson is None:
+    st.error("Cannot proceed without GeoJSON data. Please check the URLs or provide local GeoJSON files.")
+    st.stop()
 
-tab1, tab2, tab3 = st.tabs(["States", "Districts", "Postal Codes"])
+st.header(category)
+map_metric = st.selectbox(
+    "Map metric", list(views_phonepe.MAP_METRICS[category]), format_func=views_phonepe.MAP_METRICS[category].get
+)
 
-if category == "Transactions":
-    with tab1:
-        st.subheader("Top 10 States")
-        key = (selected_year, selected_quarter, "All India")
-        df = map_transaction_state_dict[key]
-        top_states = df.sort_values("Transaction_count", ascending=False).head(10)
-        for i, row in top_states.iterrows():
-            st.markdown(f"{i+1}. {row['States']}: {row['Transaction_count']/10000000:,.2f}Cr")
-
-    with tab2:
-        st.subheader("Top 10 Districts")
-        key = (selected_year, selected_quarter, selected_state)
-        df = map_transaction_district_dict[key]
-        top_districts = df.sort_values("Transaction_count", ascending=False).head(10)
-        for i, row in top_districts.iterrows():
-            st.markdown(f"{i+1}. {row['Districts']}: {row['Transaction_count']/100000:,.2f}L")
-
-    with tab3:
-        st.subheader("Top 10 Postal Codes")
-        key = (selected_year, selected_quarter, selected_state)
-        df = top_transaction_dict[key]
-        top_pincodes = df.sort_values("Transaction_count", ascending=False).head(10)
-        for i, row in top_pincodes.iterrows():
-            if pd.notna(row['Pincodes']):
-                st.markdown(f"{i+1}. {row['Pincodes']}: {row['Transaction_count']/100000:,.2f}L")
-else: 
-    with tab1:
-        st.subheader("Top 10 States")
-        key = (selected_year, selected_quarter, "All India")
-        df = map_user_state_dict[key]
-        top_states = df.sort_values("RegisteredUser", ascending=False).head(10)
-        for i, row in top_states.iterrows():
-            st.markdown(f"{i+1}. {row['States']}: {row['RegisteredUser']/10000000:,.2f}Cr")
-
-    with tab2:
-        st.subheader("Top 10 Districts")
-        key = (selected_year, selected_quarter, selected_state)
-        df = map_user_district_dict[key]
-        top_districts = df.sort_values("RegisteredUser", ascending=False).head(10)
-        for i, row in top_districts.iterrows():
-            st.markdown(f"{i+1}. {row['Districts']}: {row['RegisteredUser']/100000:,.2f}L")
-
-    with tab3:
-        st.subheader("Top 10 Postal Codes")
-        key = (selected_year, selected_quarter, selected_state)
-        df = top_user_dict[key]
-        top_pincodes = df.sort_values("RegisteredUser", ascending=False).head(10)
-        for i, row in top_pincodes.iterrows():
-            if pd.notna(row['Pincodes']):
-                st.markdown(f"{i+1}. {row['Pincodes']}: {row['RegisteredUser']/100000:,.2f}L")
+#Same view data prerender_phonepe.py writes out for the static mirror
+explore_view = views_phonepe.build_view(pre_agg_data, category, selected_year, selected_quarter, selected_state, map_metric)
 
+with st.spinner("Loading map..."):
+    from choropleth_phonepe import choropleth
+    map_spec = explore_view["map"]
+    choropleth(
+        views_phonepe.map_frame(map_spec),
+        geometry_key=map_spec["geometry_key"],
+        geojson=map_geojson,
+        locations=map_spec["locations"],
+        featureidkey=map_spec["featureidkey"],
+        color=map_spec["color"],
+        hover_name=map_spec["hover_name"],
+        hover_columns=map_spec["hover_columns"],
+        title=map_spec["title"]
+    )
+    unmatched_districts_warning(explore_view["unmatched_districts"])
+
+for column, (label, value, tag) in zip(st.columns([2, 1, 1] if len(explore_view["metrics"]) == 3 else [1, 1]), explore_view["metrics"]):
+    with column:
+        st.subheader(label)
+        st.markdown(f"<{tag} style='color: #e6e6e6;'>{value}</{tag}>", unsafe_allow_html=True)
 
-st.markdown("""
-    <div style='text-align: center; margin-top: 20px;'>
-        <button style='background-color: transparent; color: #00ddeb; border: 2px solid #00ddeb; padding: 10px 20px; border-radius: 20px;'>
-            EXPLORE SPECIAL DATA POINTS
-        </button>
-    </div>
-""", unsafe_allow_html=True)
+if category == "Transactions":
+    st.subheader("Categories")
+    if explore_view["categories"] is None:
+        st.warning(f"No transaction data available for Year {selected_year}, Quarter {selected_quarter}, State {selected_state}.")
+    else:
+        for line in explore_view["categories"]:
+            st.markdown(line)
+
+for tab, (title, lines) in zip(st.tabs(list(explore_view["top10"])), explore_view["top10"].items()):
+    with tab:
+        st.subheader(f"Top 10 {title}")
+        for line in lines:
+            st.markdown(line)
+
+
+#Download the data behind the current view, streamed in chunks from the data layer into a temporary file
+with st.expander("Download data"):
+    import tempfile
+    default_table = "map_transaction" if category == "Transactions" else "map_user"
+    export_table = st.selectbox("Dataset", data_phonepe.TABLES, index=data_phonepe.TABLES.index(default_table))
+    export_range = st.radio("Quarters", ["Selected quarter", "All quarters"], horizontal=True)
+    export_format = st.radio("Format", data_phonepe.EXPORT_FORMATS, horizontal=True)
+    if st.button("Prepare download"):
+        period = selected_year * 10 + selected_quarter
+        start, end = (period, period) if export_range == "Selected quarter" else (None, None)
+        chunks = data_phonepe.iter_slice(export_table, state=selected_state, start=start, end=end, csv_dir=source[0])
+        with tempfile.NamedTemporaryFile(suffix=f".{export_format}", delete=False) as f:
+            export_path = f.name
+        try:
+            with st.spinner("Exporting..."):
+                rows = data_phonepe.write_chunks(chunks, export_path, export_format)
+            with open(export_path, "rb") as f:
+                st.download_button(
+                    f"Download {rows:,} rows",
+                    f,
+                    file_name=f"{export_table}_{selected_state.replace(' ', '_')}.{export_format}",
+                    mime="text/csv" if export_format == "csv" else "application/octet-stream"
+                )
+        except RuntimeError as e:
+            st.error(str(e))
+        finally:
+            os.remove(export_path)
+
+#Explore special data points: ad-hoc aggregate over one table, compiled to a single parameterized query
+with st.expander("EXPLORE SPECIAL DATA POINTS"):
+    query_table = st.selectbox(
+        "Dataset", list(data_phonepe.QUERY_COLUMNS), key="query_table",
+        index=list(data_phonepe.QUERY_COLUMNS).index("map_transaction" if category == "Transactions" else "map_user")
+    )
+    query_dimensions, query_measures = data_phonepe.QUERY_COLUMNS[query_table]
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        group_by = st.multiselect("Group by", query_dimensions, default=["States"], key="query_group_by")
+    with col2:
+        measures = st.multiselect("Measures", query_measures, default=query_measures, key="query_measures")
+    with col3:
+        aggregate = st.selectbox("Aggregate", list(data_phonepe.QUERY_AGGREGATES), key="query_aggregate")
+    query_states = st.multiselect(
+        "States", dimensions["states"], default=[] if selected_state == "All India" else [selected_state],
+        key="query_states", help="leave empty for All India"
+    )
+    periods = [year * 10 + quarter for year in years for quarter in quarters]
+    query_start, query_end = st.select_slider(
+        "Quarters", options=periods, value=(periods[0], periods[-1]), format_func=data_phonepe.period_label,
+        key="query_periods"
+    )
+    if st.button("Run query"):
+        try:
+            st.session_state["query"] = data_phonepe.normalize_query(
+                query_table, group_by, measures, aggregate, query_states, query_start, query_end
+            )
+        except ValueError as e:
+            st.warning(str(e))
+    if "query" in st.session_state:
+        try:
+            with st.spinner("Running query..."):
+                result, truncated = run_query(source, st.session_state["query"])
+        except (TimeoutError, data_phonepe.QueryBusyError) as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"Error running query: {e}")
+        else:
+            if truncated:
+                st.caption(f"Showing the first {data_phonepe.QUERY_ROW_CAP:,} rows; narrow the filters to see the rest.")
+            st.dataframe(result, use_container_width=True, hide_index=True)
@@ -0,0 +1,35 @@
+import json
+import os
+import sys
+
+import pytest
+
+#The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import phonepe
+
+STATES = ["karnataka", "kerala", "tamil-nadu"]
+
+
+def write_json(path, doc):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(doc, f)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # A small pulse-master data/ tree: map_user and top_user for three states, two years of quarters
+    root = tmp_path / "data"
+    for s, state in enumerate(STATES):
+        for year in [2021, 2022]:
+            for quarter in range(1, 5):
+                hover = {f"{state} district {d}": {"registeredUsers": 1000 * s + d + quarter, "appOpens": 10 * d + year}
+                         for d in range(5)}
+                write_json(os.path.join(root, phonepe.DATASETS["map_user"][0], state, str(year), f"{quarter}.json"),
+                           {"data": {"hoverData": hover}})
+                pincodes = [{"name": str(560000 + 100 * s + p), "registeredUsers": 50 * p + quarter} for p in range(5)]
+                write_json(os.path.join(root, phonepe.DATASETS["top_user"][0], state, str(year), f"{quarter}.json"),
+                           {"data": {"pincodes": pincodes}})
+    return str(root)
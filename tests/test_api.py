@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import api_phonepe
+import loadtest_phonepe
+
+
+@pytest.fixture(scope="module")
+def fixture_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("fixture")
+    loadtest_phonepe.make_fixture(str(path), districts_per_state=3, pincodes_per_state=3, years=(2022, 2023))
+    return str(path)
+
+
+@pytest.fixture
+def api(fixture_dir):
+    return api_phonepe.build_api(fixture_dir, version="test")
+
+
+def get(api, target, **headers):
+    status, response_headers, body = api.respond("GET", target, headers)
+    return status, response_headers, json.loads(body) if body else None
+
+
+def test_etag_and_not_modified(api):
+    status, headers, body = get(api, "/api/states?year=2023&quarter=4")
+    assert status == 200 and headers["Cache-Control"] == api_phonepe.CACHE_CONTROL
+    assert len(body["states"]) == len(loadtest_phonepe.FIXTURE_STATES) and body["version"] == "test"
+    assert get(api, "/api/states?year=2023&quarter=4", **{"if-none-match": headers["ETag"]})[:2] == (304, {
+        "ETag": headers["ETag"], "Cache-Control": api_phonepe.CACHE_CONTROL
+    })
+    # Parameters the endpoint does not use do not change the ETag or add cache entries
+    assert get(api, "/api/states?quarter=4&year=2023&utm=x")[1]["ETag"] == headers["ETag"]
+    assert len(api.body_cache) == 1
+
+
+def test_body_cache_evicts_least_recently_used(api, monkeypatch):
+    monkeypatch.setattr(api_phonepe, "BODY_CACHE_SIZE", 2)
+    for quarter in [1, 2, 1, 3]:
+        assert get(api, f"/api/states?year=2023&quarter={quarter}")[0] == 200
+    assert [request[2] for request in api.body_cache] == [1, 3]
+
+
+@pytest.mark.parametrize("target, status", [
+    ("/api/states?year=2023", 400),
+    ("/api/states?year=x&quarter=1", 400),
+    ("/api/pincodes?year=2023&quarter=1&limit=0", 400),
+    ("/api/pincodes?year=2023&quarter=1&category=merchants", 400),
+    ("/api/states?year=2017&quarter=1", 404),
+    ("/api/districts?year=2023&quarter=1&state=Atlantis", 404),
+    ("/api/nope", 404)
+])
+def test_errors(api, target, status):
+    code, headers, body = get(api, target)
+    assert code == status and "error" in body and headers["Cache-Control"] == "no-store"
+
+
+def test_handler_exception_is_a_500(api, monkeypatch):
+    def broken(*args):
+        raise KeyError("boom")
+    monkeypatch.setitem(api_phonepe.ROUTES, "/api/states", broken)
+    assert get(api, "/api/states?year=2023&quarter=1")[0] == 500
+
+
+def test_pincodes_limit_and_category(api):
+    status, _, body = get(api, "/api/pincodes?year=2023&quarter=1&state=Kerala&category=users&limit=2")
+    assert status == 200 and len(body["pincodes"]) == 2
+    counts = [row["RegisteredUser"] for row in body["pincodes"]]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_districts_feature_ids_need_the_geojson(api, fixture_dir):
+    body = get(api, "/api/districts?year=2023&quarter=1&state=Kerala")[2]
+    assert len(body["districts"]) == 3 and "Feature_id" not in body["districts"][0]
+
+    mapped = api_phonepe.build_api(fixture_dir, version="test", geojson_dir=fixture_dir)
+    body = get(mapped, "/api/districts?year=2023&quarter=1&state=Kerala")[2]
+    assert all(isinstance(row["Feature_id"], int) for row in body["districts"])
+    assert body["districts"][0]["RegisteredUser"] > 0 and body["districts"][0]["Transaction_count"] > 0
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+import data_phonepe
+
+
+def geojson(*features):
+    return {"features": [{"properties": {"NAME_1": state, "NAME_2": district}} for state, district in features]}
+
+
+@pytest.mark.parametrize("features, districts, expected", [
+    # exact name within the state, "district" suffix and punctuation ignored
+    ([("Kerala", "Kollam"), ("Kerala", "Thiruvananthapuram")],
+     [("Kerala", "thiruvananthapuram district")], [1]),
+    # DISTRICT_ALIASES: renamed districts resolve to the GeoJSON's older name
+    ([("Karnataka", "Udupi"), ("Karnataka", "Mysore")],
+     [("Karnataka", "Mysuru")], [1]),
+    # fuzzy: a close spelling is accepted
+    ([("Karnataka", "Chamarajanagar")],
+     [("Karnataka", "Chamarajanagara")], [0]),
+    # fuzzy never crosses a different number
+    ([("Delhi", "Zone 2")],
+     [("Delhi", "Zone 1")], [None]),
+    # best score first: Chamarajanagara is closer to feature 1, so Chamarajanagr gets feature 0
+    ([("Karnataka", "Chamrajnagar"), ("Karnataka", "Chamarajanagar")],
+     [("Karnataka", "Chamarajanagara"), ("Karnataka", "Chamarajanagr")], [1, 0]),
+    # an exact match claims its feature before the fuzzy pass
+    ([("Karnataka", "Chamarajanagar")],
+     [("Karnataka", "Chamarajanagara"), ("Karnataka", "Chamarajanagar")], [None, 0]),
+    # a state missing from the GeoJSON (post-2011 split) matches against every feature
+    ([("Andhra Pradesh", "Warangal"), ("Andhra Pradesh", "Krishna")],
+     [("Telangana", "Warangal")], [0]),
+    # a state present in the GeoJSON does not match another state's features
+    ([("Kerala", "Kollam"), ("Karnataka", "Udupi")],
+     [("Kerala", "Udupi")], [None]),
+])
+def test_build_district_index(features, districts, expected):
+    index = data_phonepe.build_district_index(geojson(*features), pd.DataFrame(districts, columns=["States", "Districts"]))
+    assert index[["States", "Districts"]].values.tolist() == [list(row) for row in districts]
+    assert [None if pd.isna(fid) else fid for fid in index["Feature_id"]] == expected
+    assert str(index["Feature_id"].dtype) == "Int64"
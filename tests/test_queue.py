@@ -0,0 +1,115 @@
+import os
+import time
+from multiprocessing import Process
+
+import pandas as pd
+import pytest
+
+import phonepe
+from conftest import STATES, write_json
+
+
+def shard_status(work_dir, dataset, state):
+    queue = phonepe.connect_queue(work_dir)
+    row = queue.execute("SELECT status, attempts, worker, error FROM shards WHERE dataset = ? AND state = ?",
+                        (dataset, state)).fetchone()
+    queue.close()
+    return row
+
+
+#Work queue
+def test_claim_hands_out_each_shard_once(tmp_path, data_dir):
+    work_dir = str(tmp_path / "work")
+    assert phonepe.init_queue(work_dir, data_dir, ["map_user"]) == len(STATES)
+    queue = phonepe.connect_queue(work_dir)
+    claimed = [phonepe.claim_shard(queue, f"worker-{i}") for i in range(len(STATES))]
+    assert sorted(claimed) == [("map_user", state) for state in STATES]
+    assert phonepe.claim_shard(queue, "worker-x") is None
+    assert shard_status(work_dir, "map_user", "karnataka")[:3] == ("running", 1, "worker-0")
+
+
+def test_expired_lease_is_reclaimed(tmp_path, data_dir):
+    work_dir = str(tmp_path / "work")
+    phonepe.init_queue(work_dir, data_dir, ["map_user"])
+    queue = phonepe.connect_queue(work_dir)
+    dataset, state = phonepe.claim_shard(queue, "crashed")
+    for _ in STATES[1:]:
+        phonepe.finish_shard(queue, *phonepe.claim_shard(queue, "other"), output="x.csv")
+    assert phonepe.claim_shard(queue, "late") is None
+
+    # The worker died without finishing: once its lease has run out the shard goes to the next claimer
+    queue.execute("UPDATE shards SET claimed_at = ? WHERE dataset = ? AND state = ?",
+                  (time.time() - phonepe.LEASE_SECONDS - 1, dataset, state))
+    assert phonepe.claim_shard(queue, "rescuer") == (dataset, state)
+    assert shard_status(work_dir, dataset, state)[:3] == ("running", 2, "rescuer")
+
+
+def test_failed_shard_is_retried_up_to_max_attempts(tmp_path, data_dir):
+    work_dir = str(tmp_path / "work")
+    phonepe.init_queue(work_dir, data_dir, ["map_user"])
+    queue = phonepe.connect_queue(work_dir)
+    queue.execute("UPDATE shards SET status = 'done' WHERE state != 'kerala'")
+    for attempt in range(1, phonepe.MAX_ATTEMPTS + 1):
+        assert phonepe.claim_shard(queue, "worker") == ("map_user", "kerala")
+        phonepe.finish_shard(queue, "map_user", "kerala", error=f"boom {attempt}")
+        expected = "failed" if attempt == phonepe.MAX_ATTEMPTS else "pending"
+        assert shard_status(work_dir, "map_user", "kerala") == (expected, attempt, "worker", f"boom {attempt}")
+    assert phonepe.claim_shard(queue, "worker") is None
+
+
+def test_expired_lease_on_last_attempt_fails_the_shard(tmp_path, data_dir):
+    work_dir = str(tmp_path / "work")
+    phonepe.init_queue(work_dir, data_dir, ["map_user"])
+    queue = phonepe.connect_queue(work_dir)
+    queue.execute("UPDATE shards SET status = 'done' WHERE state != 'kerala'")
+    queue.execute("UPDATE shards SET status = 'running', attempts = ?, claimed_at = ? WHERE state = 'kerala'",
+                  (phonepe.MAX_ATTEMPTS, time.time() - phonepe.LEASE_SECONDS - 1))
+    assert phonepe.claim_shard(queue, "worker") is None
+    assert shard_status(work_dir, "map_user", "kerala")[0] == "failed"
+    assert shard_status(work_dir, "map_user", "kerala")[3] == "lease expired"
+
+
+#Merge
+def run_pipeline(data_dir, work_dir, out_dir, workers):
+    phonepe.init_queue(work_dir, data_dir, ["map_user", "top_user"], resume=True)
+    processes = [Process(target=phonepe.run_worker, args=(work_dir, data_dir, f"w{i}", 0.1)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return phonepe.merge_shards(work_dir, out_dir)
+
+
+def test_merge_is_byte_identical_for_one_and_many_workers(tmp_path, data_dir):
+    write_json(os.path.join(data_dir, phonepe.DATASETS["top_user"][0], "kerala", "2022", "4.json"), {"data": {}})
+    single = run_pipeline(data_dir, str(tmp_path / "work1"), str(tmp_path / "out1"), workers=1)
+    many = run_pipeline(data_dir, str(tmp_path / "work4"), str(tmp_path / "out4"), workers=4)
+    assert single == many == {"map_user": 120, "top_user": 115}
+    # quality_summary.json also records timings, everything else must match byte for byte
+    for name in ["map_user.csv", "top_user.csv", "quarantine.csv"]:
+        with open(tmp_path / "out1" / name, "rb") as a, open(tmp_path / "out4" / name, "rb") as b:
+            assert a.read() == b.read(), name
+
+
+def test_new_run_picks_up_changed_data(tmp_path, data_dir):
+    work_dir, out_dir = str(tmp_path / "work"), str(tmp_path / "out")
+    run_pipeline(data_dir, work_dir, out_dir, workers=2)
+    path = os.path.join(data_dir, phonepe.DATASETS["top_user"][0], "kerala", "2022", "1.json")
+    write_json(path, {"data": {"pincodes": [{"name": "560100", "registeredUsers": 987654}]}})
+
+    # A finished queue is not silently re-used...
+    with pytest.raises(RuntimeError, match="already finished"):
+        phonepe.init_queue(work_dir, data_dir, ["map_user", "top_user"])
+    # ...a reset starts over from the current data
+    phonepe.init_queue(work_dir, data_dir, ["map_user", "top_user"], reset=True)
+    run_pipeline(data_dir, work_dir, out_dir, workers=2)
+    merged = pd.read_csv(os.path.join(out_dir, "top_user.csv"))
+    kerala = merged[(merged["States"] == "Kerala") & (merged["Years"] == 2022) & (merged["Quarter"] == 1)]
+    assert kerala[["Pincodes", "RegisteredUser"]].values.tolist() == [[560100, 987654]]
+
+
+def test_resume_keeps_finished_shards(tmp_path, data_dir):
+    work_dir = str(tmp_path / "work")
+    run_pipeline(data_dir, work_dir, str(tmp_path / "out"), workers=1)
+    assert phonepe.init_queue(work_dir, data_dir, ["map_user", "top_user"], resume=True) == 0
+    assert phonepe.queue_status(work_dir)[0] == {"done": 2 * len(STATES)}
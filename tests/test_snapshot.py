@@ -0,0 +1,37 @@
+import json
+import os
+
+import snapshot_phonepe
+
+
+def stage(path, tables, timings):
+    os.makedirs(path)
+    for name, text in tables.items():
+        with open(os.path.join(path, name), "w") as f:
+            f.write(text)
+    with open(os.path.join(path, "quality_summary.json"), "w") as f:
+        json.dump({"top_user": {"rows": 2, "parse_s": timings}}, f)
+    return str(path)
+
+
+def content_hash(snapshot_id):
+    return snapshot_id.rsplit("-", 1)[1]
+
+
+def test_snapshot_hash_identifies_the_data_not_the_run(tmp_path):
+    root = str(tmp_path / "snapshots")
+    tables = {"top_user.csv": "States,Years\nKerala,2022\n", "quarantine.csv": "Dataset,States,File,Reason,Raw\n"}
+    first = snapshot_phonepe.publish_snapshot(root, stage(tmp_path / "a", tables, 0.12))
+    again = snapshot_phonepe.publish_snapshot(root, stage(tmp_path / "b", tables, 3.45))
+    changed = snapshot_phonepe.publish_snapshot(
+        root, stage(tmp_path / "c", dict(tables, **{"top_user.csv": "States,Years\nKerala,2023\n"}), 0.12)
+    )
+    assert content_hash(first) == content_hash(again) != content_hash(changed)
+    assert set(snapshot_phonepe.snapshot_manifest(root, first)["tables"]) == {"top_user", "quarantine"}
+
+
+def test_resolve_source_defaults_to_current(tmp_path):
+    root = str(tmp_path / "snapshots")
+    old = snapshot_phonepe.publish_snapshot(root, stage(tmp_path / "a", {"top_user.csv": "a\n1\n"}, 0.1))
+    snapshot_phonepe.activate_snapshot(root, old)
+    assert snapshot_phonepe.resolve_source(snapshot_root=root) == (os.path.join(root, old), old)
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pandas as pd
+
+import phonepe
+
+
+def top_user_frame(rows):
+    return pd.DataFrame(
+        [dict(zip(["States", "Years", "Quarter", "Pincodes", "RegisteredUser"], row), File="2022/1.json") for row in rows]
+    )
+
+
+def test_validate_frame_rejects_null_pincodes():
+    valid, rejected = phonepe.validate_frame(top_user_frame([
+        ("Kerala", "2022", "1", "682001", 10),
+        ("Kerala", "2022", "1", None, 20),
+        ("Kerala", "2022", "1", "not-a-pincode", 30)
+    ]))
+    assert valid["Pincodes"].tolist() == [682001]
+    assert rejected["Reason"].tolist() == ["missing or non-numeric Pincodes"] * 2
+
+
+def test_validate_frame_keeps_the_first_of_duplicate_keys():
+    valid, rejected = phonepe.validate_frame(top_user_frame([
+        ("Kerala", "2022", "1", "682001", 10),
+        ("Kerala", "2022", "1", "682001", 99),
+        ("Kerala", "2022", "2", "682001", 11)
+    ]))
+    assert valid["RegisteredUser"].tolist() == [10, 11]
+    assert rejected["Reason"].tolist() == ["duplicate key"]
+    assert json.loads(rejected["Raw"][0])["RegisteredUser"] == 99
+
+
+def test_validate_frame_rejects_negative_measures():
+    valid, rejected = phonepe.validate_frame(top_user_frame([
+        ("Kerala", "2022", "1", "682001", 10),
+        ("Kerala", "2022", "1", "682002", -5)
+    ]))
+    assert len(valid) == 1
+    assert rejected[["File", "Reason"]].values.tolist() == [["2022/1.json", "negative RegisteredUser"]]
+
+
+def test_malformed_file_is_quarantined_and_the_shard_still_loads(tmp_path, data_dir):
+    path = os.path.join(data_dir, phonepe.DATASETS["map_user"][0], "kerala", "2022", "3.json")
+    with open(path, "w") as f:
+        f.write('{"data": {"hoverData": ')
+    work_dir = str(tmp_path / "work")
+    output = phonepe.process_shard(work_dir, data_dir, "map_user", "kerala")
+
+    assert len(pd.read_csv(output)) == 7 * 5
+    quarantine = pd.read_csv(phonepe.shard_output_path(work_dir, "map_user", "kerala", ".quarantine.csv"))
+    assert quarantine["File"].tolist() == ["2022/3.json"]
+    assert quarantine["Reason"][0].startswith("malformed file: JSONDecodeError")
+    with open(phonepe.shard_output_path(work_dir, "map_user", "kerala", ".quality.json")) as f:
+        quality = json.load(f)
+    assert (quality["rows"], quality["quarantined_files"], quality["reasons"]) == (35, 1, {"malformed file": 1})
@@ -0,0 +1,176 @@
+import os
+import shutil
+
+import pandas as pd
+
+import data_phonepe
+
+# The Explore view for one sidebar selection (category, year, quarter, region) as plain data: map spec, headline
+# metrics, categories and top-10 lists, with the display strings already formatted. stream_phonepe.py renders it
+# with Streamlit; prerender_phonepe.py writes it to static JSON/HTML. No streamlit import here.
+
+CATEGORIES = ["Transactions", "Users"]
+
+#plotly.express "Reds", so the map looks the same as the px.choropleth it replaces
+REDS = [
+    "rgb(255,245,240)", "rgb(254,224,210)", "rgb(252,187,161)", "rgb(252,146,114)", "rgb(251,106,74)",
+    "rgb(239,59,44)", "rgb(203,24,29)", "rgb(165,15,21)", "rgb(103,0,13)"
+]
+REDS_COLORSCALE = [[i / (len(REDS) - 1), color] for i, color in enumerate(REDS)]
+
+#category -> (map tables, top-10 table, measures; the first measure colors the map and ranks the top 10)
+VIEW_TABLES = {
+    "Transactions": ("map_transaction_state_dict", "map_transaction_district_dict", "top_transaction_dict",
+                     ["Transaction_count", "Transaction_amount"]),
+    "Users": ("map_user_state_dict", "map_user_district_dict", "top_user_dict", ["RegisteredUser", "AppOpens"])
+}
+
+#Choropleth metrics per category, read from the joined users x transactions tables: column -> map title label.
+#The first one is the default and matches the category's headline measure.
+MAP_METRICS = {
+    "Transactions": {
+        "Transaction_count": "Transaction Count",
+        "Transaction_amount": "Transaction Amount",
+        "Avg_ticket": "Average Ticket Size",
+        "Transactions_per_user": "Transactions per User"
+    },
+    "Users": {
+        "RegisteredUser": "Registered Users",
+        "AppOpens": "App Opens",
+        "AppOpens_per_user": "App Opens per User",
+        "Transactions_per_user": "Transactions per User"
+    }
+}
+
+
+#plotly.js as shipped with the installed plotly package; the map component and the static mirror serve this copy
+#instead of a CDN, so both work offline and always match the environment's plotly version
+PLOTLY_JS = "plotly.min.js"
+
+
+def install_plotly_js(target_dir):
+    # Copies plotly.min.js next to the pages that load it; re-copied only when the installed build changes
+    import plotly
+
+    source = os.path.join(os.path.dirname(plotly.__file__), "package_data", PLOTLY_JS)
+    target = os.path.join(target_dir, PLOTLY_JS)
+    source_stat = os.stat(source)
+    if os.path.exists(target):
+        target_stat = os.stat(target)
+        if (target_stat.st_size, int(target_stat.st_mtime)) == (source_stat.st_size, int(source_stat.st_mtime)):
+            return target
+    os.makedirs(target_dir, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+    return target
+
+
+def hover_text(df, name_column, value_columns):
+    text = df[name_column].astype(str)
+    for column in value_columns:
+        number_format = "{:,.2f}" if column in data_phonepe.RATIO_METRICS else "{:,.0f}"
+        text = text + f"<br>{column}: " + df[column].map(number_format.format).astype(str)
+    return text.tolist()
+
+
+def _top10(df, name_column, measure, unit, divisor):
+    top = df.dropna(subset=[name_column]).sort_values(measure, ascending=False).head(10)
+    return [
+        (f"{rank}. {name}: {value / divisor:,.2f}{unit}")
+        for rank, (name, value) in enumerate(zip(top[name_column], top[measure]), start=1)
+    ]
+
+
+def build_view(pre_agg_data, category, year, quarter, state, metric=None):
+    # metric: a MAP_METRICS column for the choropleth (default: the category's first)
+    state_table, district_table, top_table, measures = VIEW_TABLES[category]
+    metric = metric or next(iter(MAP_METRICS[category]))
+    label = MAP_METRICS[category][metric]
+    key = (year, quarter, state)
+    districts = pre_agg_data[district_table][key]
+
+    if state == "All India":
+        map_df = pre_agg_data[state_table][key]
+        map_spec = dict(
+            data=pre_agg_data["state_metrics_dict"][key], geometry_key="states", locations="States",
+            featureidkey="properties.ST_NM", hover_name="States", title=f"{label} by State (Q{quarter} {year})"
+        )
+    else:
+        map_df = districts
+        map_spec = dict(
+            data=pre_agg_data["district_metrics_dict"][key], geometry_key=f"districts:{state}", locations="Feature_id",
+            featureidkey="properties.FID", hover_name="Districts", title=f"{label} in {state} (Q{quarter} {year})"
+        )
+    map_spec.update(color=metric, hover_columns=measures + ([] if metric in measures else [metric]))
+
+    #Headline numbers: (label, formatted value, heading tag)
+    if category == "Transactions":
+        total_transactions = map_df["Transaction_count"].sum()
+        total_amount = map_df["Transaction_amount"].sum()
+        avg_transaction = total_amount / total_transactions if total_transactions > 0 else 0
+        metrics = [
+            ("All PhonePe transactions (UPI + Cards + Wallets)", f"{total_transactions:,}", "h1"),
+            ("Total payment value", f"₹{total_amount/10000000:,.0f} Cr", "h3"),
+            ("Avg. transaction value", f"₹{avg_transaction:,.0f}", "h3")
+        ]
+        categories_data = data_phonepe.category_breakdown(pre_agg_data["category_matrix"], key)
+        if not categories_data or sum(value["Transaction_count"] for value in categories_data.values()) == 0:
+            categories = None
+        else:
+            categories = [
+                f"{name}: {value['Transaction_count']:,} (₹{value['Transaction_amount']/10000000:,.0f} Cr)"
+                for name, value in categories_data.items()
+            ]
+    else:
+        metrics = [
+            (f"Registered PhonePe users till Q{quarter} {year}", f"{map_df['RegisteredUser'].sum():,}", "h1"),
+            (f"PhonePe app opens in Q{quarter} {year}", f"{map_df['AppOpens'].sum():,}", "h1")
+        ]
+        categories = None
+
+    return {
+        "category": category,
+        "key": key,
+        "map": map_spec,
+        "unmatched_districts": [] if state == "All India" else districts.loc[districts["Feature_id"].isna(), "Districts"].tolist(),
+        "metrics": metrics,
+        "categories": categories,
+        "top10": {
+            "States": _top10(pre_agg_data[state_table][(year, quarter, "All India")], "States", measures[0], "Cr", 10000000),
+            "Districts": _top10(districts, "Districts", measures[0], "L", 100000),
+            "Postal Codes": _top10(pre_agg_data[top_table][key], "Pincodes", measures[0], "L", 100000)
+        }
+    }
+
+
+def map_frame(spec):
+    # Rows that can be drawn: districts without a matched feature id are listed separately instead, and
+    # regions without a value for the metric (e.g. no users for a per-user ratio) are left blank
+    subset = ["Feature_id", spec["color"]] if spec["locations"] == "Feature_id" else [spec["color"]]
+    return spec["data"].dropna(subset=subset)
+
+
+def view_payload(view):
+    # JSON-serializable form of build_view(): the map as locations/z/hover text instead of a DataFrame
+    spec = view["map"]
+    df = map_frame(spec)
+    locations = df[spec["locations"]]
+    return {
+        "category": view["category"],
+        "year": int(view["key"][0]),
+        "quarter": int(view["key"][1]),
+        "region": view["key"][2],
+        "map": {
+            "geometry_key": spec["geometry_key"],
+            "featureidkey": spec["featureidkey"],
+            "locations": locations.astype(int).tolist() if spec["locations"] == "Feature_id" else locations.tolist(),
+            "z": pd.to_numeric(df[spec["color"]]).astype(float).tolist(),
+            "text": hover_text(df, spec["hover_name"], spec["hover_columns"]),
+            "title": spec["title"]
+        },
+        "unmatched_districts": view["unmatched_districts"],
+        "metrics": [list(metric) for metric in view["metrics"]],
+        "categories": view["categories"],
+        "top10": view["top10"]
+    }